@@ -0,0 +1,146 @@
+"""Сжатие и минификация HTML-ответов.
+
+CompressionMiddleware убирает из HTML отступы шаблонов и сжимает ответ
+в br или gzip по Accept-Encoding. Для страниц, которые кешируются
+(cache_page ставит им max-age), готовое тело кладётся в кеш по хешу
+исходного содержимого, и повторные попадания в кеш страницы не сжимают
+его заново.
+"""
+import gzip
+import hashlib
+import io
+import re
+import zlib
+
+import brotli
+from django.conf import settings
+from django.core.cache import cache
+
+
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/x-ndjson",
+    "application/javascript", "application/xml", "image/svg+xml",
+)
+# Поддерживаемые Content-Encoding в порядке предпочтения.
+ENCODINGS = ("br", "gzip")
+CACHE_PREFIX = "compressed"
+
+# Содержимое этих тегов выводится как есть, его не трогаем.
+PRESERVED = re.compile(
+    r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+# Только пробельные символы HTML: неразрывный пробел значим.
+INDENT = re.compile(r"[ \t\r\f]*\n[ \t\r\n\f]*")
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    accepted = set()
+    for item in (header or "").split(","):
+        coding, _, params = item.partition(";")
+        name, _, quality = params.strip().partition("=")
+        try:
+            if name.strip() == "q" and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def choose_encoding(header):
+    """Лучшая поддерживаемая кодировка из Accept-Encoding или None."""
+    accepted = accepted_encodings(header)
+    for encoding in ENCODINGS:
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def gzip_compress(data, level=9):
+    # mtime=0 делает результат воспроизводимым.
+    buffer = io.BytesIO()
+    with gzip.GzipFile(
+        fileobj=buffer, mode="wb", compresslevel=level, mtime=0
+    ) as compressed:
+        compressed.write(data)
+    return buffer.getvalue()
+
+
+def brotli_compress(data, quality=11):
+    return brotli.compress(data, quality=quality)
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli_compress(data, settings.COMPRESS_BROTLI_QUALITY)
+    return gzip_compress(data, settings.COMPRESS_GZIP_LEVEL)
+
+
+def compress_stream(chunks, encoding):
+    """Сжимает поток по кускам, сбрасывая буфер после каждого, чтобы
+    потоковая страница не теряла ранний первый байт."""
+    if encoding == "br":
+        compressor = brotli.Compressor(
+            quality=settings.COMPRESS_BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    # wbits=31 — формат gzip с заголовком.
+    compressor = zlib.compressobj(settings.COMPRESS_GZIP_LEVEL, wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def minify_html(html):
+    """Схлопывает переводы строк с отступами в один перевод строки.
+
+    Пробелы внутри строки не трогаются: в значениях атрибутов и между
+    строчными элементами они значимы. pre, textarea, script и style
+    остаются как есть."""
+    parts = []
+    position = 0
+    for match in PRESERVED.finditer(html):
+        parts.append(INDENT.sub("\n", html[position:match.start()]))
+        parts.append(match.group())
+        position = match.end()
+    parts.append(INDENT.sub("\n", html[position:]))
+    return "".join(parts).strip()
+
+
+def is_compressible(content_type):
+    return content_type.split(";")[0].strip().lower().startswith(
+        COMPRESSIBLE_TYPES)
+
+
+def cache_key(content, encoding):
+    digest = hashlib.sha1(content).hexdigest()
+    return f"{CACHE_PREFIX}:{encoding or 'identity'}:{digest}"
+
+
+def encode_body(content, content_type, charset, encoding, timeout=None):
+    """Минифицированное и сжатое тело ответа.
+
+    С timeout результат берётся из кеша и кладётся в него на это время.
+    Возвращает (тело, применённая кодировка или None)."""
+    key = cache_key(content, encoding)
+    if timeout:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    body = content
+    if settings.HTML_MINIFY and content_type.startswith("text/html"):
+        body = minify_html(content.decode(charset)).encode(charset)
+    applied = None
+    if encoding and len(body) >= settings.COMPRESS_MIN_SIZE:
+        compressed = compress(body, encoding)
+        if len(compressed) < len(body):
+            body, applied = compressed, encoding
+    if timeout:
+        cache.set(key, (body, applied), timeout)
+    return body, applied
@@ -0,0 +1,44 @@
+"""Окружение Jinja2 с теми же помощниками, что и у шаблонов Django."""
+import logging
+
+from django.template.defaultfilters import date, truncatechars
+from django.templatetags.static import static
+from jinja2 import Environment, Undefined
+
+from core.templatetags.user_filters import addclass
+from core.urlcache import fast_reverse
+
+
+logger = logging.getLogger(__name__)
+
+
+def thumbnail(image, geometry, **options):
+    """Миниатюра sorl или None, как пустой {% thumbnail %}."""
+    from sorl.thumbnail import get_thumbnail
+
+    if not image:
+        return None
+    try:
+        return get_thumbnail(image, geometry, **options)
+    except Exception:
+        # Тег sorl тоже не роняет страницу из-за битой картинки.
+        logger.exception("Не удалось получить миниатюру %s", image)
+        return None
+
+
+def environment(**options):
+    # В DEBUG бэкенд выбирает DebugUndefined, который печатает имя
+    # переменной; шаблоны же, как и в Django, рассчитывают на пустую строку.
+    options["undefined"] = Undefined
+    env = Environment(**options)
+    env.globals.update({
+        "static": static,
+        "url": fast_reverse,
+        "thumbnail": thumbnail,
+    })
+    env.filters.update({
+        "addclass": addclass,
+        "date": date,
+        "truncatechars": truncatechars,
+    })
+    return env
@@ -0,0 +1,234 @@
+"""Очередь фоновых задач в базе, без внешнего брокера.
+
+Задача — функция из модуля tasks приложения, отмеченная @task.
+enqueue() ставит её в таблицу Job после коммита текущей транзакции,
+а manage.py runworker выполняет задачи в нескольких потоках, повторяя
+упавшие с растущей паузой. Задача, чей воркер упал, выполнится снова
+после JOB_TIMEOUT, поэтому задачи должны быть идемпотентны.
+"""
+import json
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (
+    DatabaseError, close_old_connections, connection, transaction,
+)
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+from .stats import percentile
+
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+# Сколько кандидатов просматривать за один захват задачи.
+CLAIM_CANDIDATES = 10
+
+
+def task(name, max_attempts=None):
+    """Регистрирует функцию как задачу с именем name."""
+    def decorator(func):
+        func.task_name = name
+        func.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def load_tasks():
+    autodiscover_modules("tasks")
+
+
+def enqueue(name, *args, run_at=None, **kwargs):
+    """Ставит задачу в очередь, когда текущая транзакция закоммитится.
+
+    Аргументы должны сериализоваться в JSON: передавайте id, а не
+    объекты моделей."""
+    func = TASKS[name]
+    payload = json.dumps({"args": args, "kwargs": kwargs})
+
+    def create():
+        Job.objects.create(
+            name=name, payload=payload, max_attempts=func.max_attempts,
+            run_at=run_at or timezone.now(),
+        )
+
+    transaction.on_commit(create)
+
+
+def claim():
+    """Захватывает одну задачу, которой пора выполняться, или None.
+
+    Захват — условный UPDATE, поэтому два воркера не получат одну
+    задачу даже без SELECT FOR UPDATE (SQLite его не поддерживает).
+    Выполняющиеся задачи с истёкшим сроком берутся заново."""
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status__in=(Job.QUEUED, Job.RUNNING), run_at__lte=now,
+    ).order_by("run_at").values_list("pk", "status", "run_at")
+    for pk, status, run_at in candidates[:CLAIM_CANDIDATES]:
+        claimed = Job.objects.filter(
+            pk=pk, status=status, run_at=run_at,
+        ).update(
+            status=Job.RUNNING, started=now,
+            run_at=now + timedelta(seconds=settings.JOB_TIMEOUT),
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def execute(job):
+    """Выполняет захваченную задачу и записывает результат."""
+    job.attempts += 1
+    try:
+        func = TASKS[job.name]
+        payload = json.loads(job.payload)
+        func(*payload.get("args", ()), **payload.get("kwargs", {}))
+    except Exception as error:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            job.finished = timezone.now()
+            logger.error("Задача %s не выполнена: %r", job, error)
+        else:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+            logger.warning("Задача %s упала, повтор в %s: %r",
+                           job, job.run_at, error)
+    else:
+        job.status = Job.DONE
+        job.finished = timezone.now()
+    job.save(update_fields=[
+        "attempts", "last_error", "status", "run_at", "finished"])
+    return job
+
+
+def run_next():
+    """Выполняет одну задачу; False, если выполнять нечего."""
+    job = claim()
+    if job is None:
+        return False
+    execute(job)
+    return True
+
+
+def prune():
+    """Удаляет выполненные задачи старше JOB_KEEP_DONE и неудачные
+    старше JOB_KEEP_FAILED."""
+    now = timezone.now()
+    deleted, _ = Job.objects.filter(
+        Q(status=Job.DONE,
+          finished__lt=now - timedelta(seconds=settings.JOB_KEEP_DONE))
+        | Q(status=Job.FAILED,
+            finished__lt=now - timedelta(seconds=settings.JOB_KEEP_FAILED))
+    ).delete()
+    return deleted
+
+
+def worker(stop, burst, interval):
+    """Цикл одного потока runworker."""
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                if run_next():
+                    continue
+            except DatabaseError:
+                # Например, "database is locked" у SQLite: подождём
+                # и попробуем снова.
+                logger.exception("Ошибка базы в воркере")
+            else:
+                if burst:
+                    return
+            stop.wait(interval)
+    finally:
+        connection.close()
+
+
+def run_workers(concurrency=1, burst=False, interval=1.0, stop=None):
+    """Запускает concurrency потоков-воркеров и ждёт их, раз в
+    JOB_PRUNE_INTERVAL удаляя старые задачи.
+
+    burst — выйти, когда очередь опустеет; stop — threading.Event для
+    остановки извне. Возвращает, сколько задач удалено."""
+    load_tasks()
+    stop = stop or threading.Event()
+    threads = [
+        threading.Thread(
+            target=worker, args=(stop, burst, interval), daemon=True)
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    pruned = 0
+    next_prune = time.monotonic() + settings.JOB_PRUNE_INTERVAL
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=1)
+                if time.monotonic() < next_prune:
+                    continue
+                # Воркер может работать неделями: чистим по ходу, а не
+                # только при выходе.
+                try:
+                    pruned += prune()
+                except DatabaseError:
+                    logger.exception("Не удалось удалить старые задачи")
+                next_prune = time.monotonic() + settings.JOB_PRUNE_INTERVAL
+    except KeyboardInterrupt:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return pruned + prune()
+
+
+def stats(window=None):
+    """Глубина очереди и задержки задач по именам за последние window
+    секунд: ожидание в очереди и время выполнения."""
+    now = timezone.now()
+    since = now - timedelta(seconds=window or settings.JOB_STATS_WINDOW)
+    rows = {}
+    counts = Job.objects.values("name").annotate(
+        queued=Count("pk", filter=Q(status=Job.QUEUED)),
+        running=Count("pk", filter=Q(status=Job.RUNNING)),
+        failed=Count("pk", filter=Q(status=Job.FAILED)),
+        done=Count("pk", filter=Q(status=Job.DONE, finished__gte=since)),
+    )
+    for row in counts:
+        rows[row["name"]] = {**row, "wait": [], "run": []}
+    finished = Job.objects.filter(
+        status=Job.DONE, finished__gte=since,
+    ).order_by("-finished").values_list(
+        "name", "created", "started", "finished")
+    for name, created, started, done in finished[:settings.JOB_STATS_LIMIT]:
+        rows[name]["wait"].append((started - created).total_seconds())
+        rows[name]["run"].append((done - started).total_seconds())
+    oldest = dict(
+        Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+        .values("name").annotate(oldest=Min("created"))
+        .values_list("name", "oldest")
+    )
+    result = []
+    for name in sorted(rows):
+        row = rows[name]
+        wait, run = sorted(row.pop("wait")), sorted(row.pop("run"))
+        row["wait_p50"] = percentile(wait, 50)
+        row["wait_p95"] = percentile(wait, 95)
+        row["run_p50"] = percentile(run, 50)
+        row["run_p95"] = percentile(run, 95)
+        row["oldest_age"] = (
+            (now - oldest[name]).total_seconds() if name in oldest else None)
+        result.append(row)
+    return result
@@ -0,0 +1,359 @@
+"""Генератор нагрузки для запущенного локального сервера.
+
+Каждый поток — виртуальный пользователь со своим keep-alive соединением
+и cookie. Сценарии выбираются случайно с весами из --mix; каждый запрос
+записывается под именем эндпоинта, по которым потом считаются RPS,
+перцентили задержки, время до первого байта (TTFB) и доля ошибок.
+"""
+import io
+import random
+import threading
+import time
+import uuid
+from http.client import HTTPConnection
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.urls import reverse
+
+from .stats import percentile
+
+
+MIX = (
+    "index:4,group_list:2,post_detail:2,follow_index:2,"
+    "post_create:1,add_comment:1,follow:1"
+)
+PERCENTILES = (50, 90, 99)
+
+SCENARIOS = {}
+
+
+def scenario(name, auth=False):
+    """Регистрирует сценарий; auth — нужен ли залогиненный пользователь."""
+    def decorator(func):
+        func.auth = auth
+        SCENARIOS[name] = func
+        return func
+    return decorator
+
+
+def parse_mix(mix):
+    """"index:4,follow:1" -> {"index": 4, "follow": 1}."""
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.strip().partition(":")
+        if name not in SCENARIOS:
+            raise ValueError(f"Неизвестный сценарий: {name}.")
+        weights[name] = int(weight or 1)
+    return weights
+
+
+class Stats:
+    """Задержки и ошибки по эндпоинтам, общие для всех потоков."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.ttfbs = {}
+        self.errors = {}
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, endpoint, seconds, ok, ttfb=None):
+        """ttfb — время до первого байта тела; у потоковых страниц оно
+        заметно меньше полной задержки."""
+        with self.lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            self.ttfbs.setdefault(endpoint, []).append(
+                seconds if ttfb is None else ttfb)
+            self.errors.setdefault(endpoint, 0)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def rows(self):
+        """По строке на эндпоинт плюс итоговая "total"."""
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        endpoints = sorted(self.latencies)
+        groups = [
+            (name, self.latencies[name], self.ttfbs[name], self.errors[name])
+            for name in endpoints
+        ]
+        groups.append((
+            "total",
+            [value for group in groups for value in group[1]],
+            [value for group in groups for value in group[2]],
+            sum(self.errors.values()),
+        ))
+        rows = []
+        for name, latencies, ttfbs, errors in groups:
+            latencies = sorted(latencies)
+            row = {
+                "endpoint": name,
+                "requests": len(latencies),
+                "rps": len(latencies) / elapsed if elapsed else 0.0,
+                "error_rate": errors / len(latencies) if latencies else 0.0,
+            }
+            for q in PERCENTILES:
+                row[f"p{q}"] = percentile(latencies, q) * 1000
+            row["max"] = (latencies[-1] if latencies else 0.0) * 1000
+            row["ttfb_p50"] = percentile(sorted(ttfbs), 50) * 1000
+            rows.append(row)
+        return rows
+
+
+def tiny_image(rng):
+    """Уникальная маленькая PNG: одинаковые файлы хранилище схлопнуло бы."""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    color = tuple(rng.randrange(256) for _ in range(3))
+    Image.new("RGB", (8, 8), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def multipart(fields, files):
+    """Кодирует форму в multipart/form-data."""
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(
+            f"--{boundary}\r\nContent-Disposition: form-data; "
+            f'name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for name, (filename, content, content_type) in files.items():
+        body.write(
+            f"--{boundary}\r\nContent-Disposition: form-data; "
+            f'name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n".encode()
+        )
+        body.write(content + b"\r\n")
+    body.write(f"--{boundary}--\r\n".encode())
+    return body.getvalue(), f"multipart/form-data; boundary={boundary}"
+
+
+class VirtualUser:
+    """HTTP-клиент одного потока: keep-alive соединение и свои cookie."""
+
+    def __init__(self, base_url, stats, rng=random, timeout=30):
+        url = urlsplit(base_url)
+        self.random = rng
+        self.host = url.hostname
+        self.port = url.port
+        self.timeout = timeout
+        self.stats = stats
+        self.cookies = SimpleCookie()
+        self.connection = None
+        self.username = None
+
+    def connect(self):
+        self.connection = HTTPConnection(
+            self.host, self.port, timeout=self.timeout)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def request(self, endpoint, method, path, body=None, content_type=None,
+                expect=None):
+        """Выполняет запрос и записывает его в статистику.
+
+        Редиректы не отслеживаются: каждый ответ меряется отдельно.
+        expect — единственный успешный статус; по умолчанию любой < 400."""
+        headers = {}
+        if self.cookies:
+            headers["Cookie"] = "; ".join(
+                f"{key}={morsel.value}" for key, morsel in self.cookies.items()
+            )
+        if method == "POST":
+            headers["X-CSRFToken"] = self.csrf_token()
+            headers["Content-Type"] = content_type
+        started = time.perf_counter()
+        status = 0
+        ttfb = None
+        try:
+            if self.connection is None:
+                self.connect()
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            if response.read1(1):
+                ttfb = time.perf_counter() - started
+            response.read()
+            status = response.status
+            for header in response.headers.get_all("Set-Cookie") or ():
+                self.cookies.load(header)
+            if response.will_close:
+                self.close()
+        except (OSError, ValueError):
+            # Разорванное соединение считаем ошибкой и открываем заново.
+            self.close()
+        ok = status == expect if expect else 0 < status < 400
+        self.stats.record(endpoint, time.perf_counter() - started, ok, ttfb)
+        return status
+
+    def csrf_token(self):
+        morsel = self.cookies.get("csrftoken")
+        return morsel.value if morsel else ""
+
+    def get(self, endpoint, path):
+        return self.request(endpoint, "GET", path)
+
+    def post(self, endpoint, path, fields, files=None):
+        """Отправляет форму; успех — только редирект, иначе форма
+        вернулась с ошибками."""
+        if files:
+            body, content_type = multipart(fields, files)
+        else:
+            body = urlencode(fields)
+            content_type = "application/x-www-form-urlencoded"
+        return self.request(
+            endpoint, "POST", path, body, content_type, expect=302)
+
+    def login(self, username, password):
+        path = reverse("users:login")
+        self.get("login", path)
+        status = self.post(
+            "login", path, {"username": username, "password": password})
+        if status != 302:
+            return False
+        self.username = username
+        return True
+
+
+class Targets:
+    """Что есть в базе: группы, посты и авторы для сценариев."""
+
+    def __init__(self, groups, post_ids, usernames):
+        self.groups = groups
+        self.post_ids = post_ids
+        self.usernames = usernames
+
+    @classmethod
+    def load(cls, limit=1000):
+        from posts.models import Group, Post, User
+
+        return cls(
+            list(Group.objects.values_list("id", "slug")[:limit]),
+            list(Post.objects.values_list("id", flat=True)[:limit]),
+            list(User.objects.filter(posts__isnull=False).distinct()
+                 .values_list("username", flat=True)[:limit]),
+        )
+
+
+@scenario("index")
+def browse_index(user, targets):
+    page = user.random.choice(("", "?page=2"))
+    user.get("index", reverse("posts:index") + page)
+
+
+@scenario("group_list")
+def browse_group(user, targets):
+    if targets.groups:
+        _, slug = user.random.choice(targets.groups)
+        user.get("group_list", reverse("posts:group_list", args=[slug]))
+
+
+@scenario("post_detail")
+def browse_post(user, targets):
+    if targets.post_ids:
+        post_id = user.random.choice(targets.post_ids)
+        user.get("post_detail", reverse("posts:post_detail", args=[post_id]))
+
+
+@scenario("follow_index", auth=True)
+def browse_follow_index(user, targets):
+    user.get("follow_index", reverse("posts:follow_index"))
+
+
+@scenario("post_create", auth=True)
+def create_post(user, targets):
+    fields = {"text": f"Нагрузочный пост {uuid.uuid4().hex}"}
+    if targets.groups and user.random.random() < 0.5:
+        fields["group"], _ = user.random.choice(targets.groups)
+    user.post(
+        "post_create", reverse("posts:post_create"), fields,
+        {"image": ("load.png", tiny_image(user.random), "image/png")},
+    )
+
+
+@scenario("add_comment", auth=True)
+def add_comment(user, targets):
+    if targets.post_ids:
+        post_id = user.random.choice(targets.post_ids)
+        user.post(
+            "add_comment", reverse("posts:add_comment", args=[post_id]),
+            {"text": f"Нагрузочный комментарий {uuid.uuid4().hex}"},
+        )
+
+
+@scenario("follow", auth=True)
+def follow_unfollow(user, targets):
+    authors = [name for name in targets.usernames if name != user.username]
+    if authors:
+        author = user.random.choice(authors)
+        user.get("follow", reverse("posts:profile_follow", args=[author]))
+        user.get("unfollow", reverse("posts:profile_unfollow", args=[author]))
+
+
+def worker(base_url, credentials, weights, targets, stats, deadline,
+           budget, seed):
+    """Цикл одного виртуального пользователя.
+
+    budget — общий счётчик оставшихся итераций (None — только по времени).
+    """
+    rng = random.Random(seed)
+    user = VirtualUser(base_url, stats, rng)
+    logged_in = credentials is not None and user.login(*credentials)
+    names = [name for name in weights
+             if logged_in or not SCENARIOS[name].auth]
+    if not names:
+        return
+    population = [weights[name] for name in names]
+    try:
+        while time.perf_counter() < deadline:
+            if budget is not None:
+                with budget["lock"]:
+                    if budget["left"] <= 0:
+                        break
+                    budget["left"] -= 1
+            name = rng.choices(names, population)[0]
+            SCENARIOS[name](user, targets)
+    finally:
+        user.close()
+
+
+def run(base_url, credentials, mix=MIX, concurrency=4, duration=10.0,
+        iterations=None, targets=None, seed=None):
+    """Гоняет сценарии в concurrency потоках и возвращает Stats.
+
+    credentials — список (username, password) для потоков по кругу; если
+    он пуст, выполняются только анонимные сценарии.
+    """
+    weights = parse_mix(mix)
+    targets = targets or Targets.load()
+    stats = Stats()
+    deadline = time.perf_counter() + duration
+    budget = None
+    if iterations is not None:
+        budget = {"lock": threading.Lock(), "left": iterations}
+    threads = []
+    for number in range(concurrency):
+        user_credentials = (
+            credentials[number % len(credentials)] if credentials else None
+        )
+        thread = threading.Thread(
+            target=worker,
+            args=(base_url, user_credentials, weights, targets, stats,
+                  deadline, budget,
+                  None if seed is None else seed + number),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    stats.finish()
+    return stats
@@ -0,0 +1,104 @@
+"""Очередь исходящей почты.
+
+QueuedEmailBackend только сохраняет письма в базу, поэтому форма сброса
+пароля не ждёт почтовый сервер. Отправляет их задача
+core.send_queued_mail в runworker или команда send_queued_mail через
+настоящий бэкенд QUEUED_EMAIL_BACKEND: пачками по одному соединению,
+с повторами и растущей паузой между попытками.
+"""
+import copy
+import pickle
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+
+from .jobs import enqueue
+from .models import QueuedEmail
+
+
+# Сколько письмо считается занятым воркером: если он упал, не отправив
+# пачку, письма вернутся в очередь по истечении этого времени.
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        rows = []
+        for message in email_messages:
+            message = copy.copy(message)
+            # Соединение не сериализуется, воркер откроет своё.
+            message.connection = None
+            rows.append(QueuedEmail(
+                message=pickle.dumps(message),
+                subject=message.subject[:255],
+                recipients=", ".join(message.recipients()),
+            ))
+        QueuedEmail.objects.bulk_create(rows)
+        if rows:
+            enqueue("core.send_queued_mail")
+        return len(rows)
+
+
+def claim(batch_size):
+    """Забирает пачку писем, которым пора уходить."""
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            QueuedEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=QueuedEmail.QUEUED, next_attempt__lte=now)
+            .order_by("next_attempt")[:batch_size]
+        )
+        QueuedEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(next_attempt=now + CLAIM_TIMEOUT)
+    return emails
+
+
+def retry_delay(attempts):
+    return timedelta(
+        seconds=settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def send_queued(batch_size=None):
+    """Отправляет одну пачку; возвращает (отправлено, неудачно)."""
+    emails = claim(batch_size or settings.EMAIL_QUEUE_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+    sent = failed = 0
+    connection = get_connection(settings.QUEUED_EMAIL_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            postpone(email, error)
+        return 0, len(emails)
+    try:
+        for email in emails:
+            try:
+                message = pickle.loads(email.message)
+                connection.send_messages([message])
+            except Exception as error:
+                postpone(email, error)
+                failed += 1
+            else:
+                email.delete()
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def postpone(email, error):
+    """Откладывает письмо до следующей попытки или помечает неудачным."""
+    email.attempts += 1
+    email.last_error = f"{type(error).__name__}: {error}"
+    if email.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+        email.status = QueuedEmail.FAILED
+    else:
+        email.next_attempt = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=[
+        "attempts", "last_error", "status", "next_attempt"])
@@ -0,0 +1,69 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.template import Context, Template
+from django.urls import reverse
+
+from core.urlcache import fast_reverse
+
+
+CALLS = 1000
+REPEAT = 5
+CASES = (
+    ("posts:post_detail", "post"),
+    ("posts:profile", "'author'"),
+    ("users:login", None),
+)
+
+
+def tag_template(tag, viewname, arg):
+    arg = f" {arg}" if arg else ""
+    return Template(
+        "{% load fast_urls %}{% for post in posts %}"
+        f'{{% {tag} "{viewname}"{arg} %}}'
+        "{% endfor %}"
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает {% url %} с {% fast_url %} и reverse() с fast_reverse(): "
+        "миллисекунды на 1000 вызовов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat", type=int, default=REPEAT,
+            help="Сколько раз повторить замер; берётся лучший.",
+        )
+
+    def best(self, func, repeat):
+        return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        context = Context({"posts": range(1, CALLS + 1)})
+        self.stdout.write(
+            f"Миллисекунды на {CALLS} вызовов, лучшее из {repeat}.")
+        self.stdout.write(
+            f"{'viewname':<20}{'url':>10}{'fast_url':>10}"
+            f"{'reverse':>10}{'fast':>10}"
+        )
+        for viewname, arg in CASES:
+            url = tag_template("url", viewname, arg)
+            fast = tag_template("fast_url", viewname, arg)
+            args = (1,) if arg == "post" else ("author",) if arg else ()
+            timings = (
+                self.best(lambda: url.render(context), repeat),
+                self.best(lambda: fast.render(context), repeat),
+                self.best(lambda: [
+                    reverse(viewname, args=args) for _ in range(CALLS)
+                ], repeat),
+                self.best(lambda: [
+                    fast_reverse(viewname, *args) for _ in range(CALLS)
+                ], repeat),
+            )
+            self.stdout.write(
+                f"{viewname:<20}"
+                + "".join(f"{timing:>10.2f}" for timing in timings)
+            )
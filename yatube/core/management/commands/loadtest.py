@@ -0,0 +1,133 @@
+import secrets
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core import loadtest
+from posts.models import Follow
+
+
+USERS = 10
+USERNAME = "loadtest_{}"
+FOLLOWS = 5
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагружает запущенный локальный сервер смесью сценариев и выводит "
+        "RPS, перцентили задержки, TTFB и долю ошибок по эндпоинтам."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "url", nargs="?", default="http://127.0.0.1:8000",
+            help="Адрес запущенного сервера.",
+        )
+        parser.add_argument(
+            "--mix", default=loadtest.MIX,
+            help="Сценарии с весами: " + ", ".join(loadtest.SCENARIOS) + ".",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=4,
+            help="Число одновременных виртуальных пользователей.",
+        )
+        parser.add_argument(
+            "--duration", type=float, default=10.0,
+            help="Длительность прогона в секундах.",
+        )
+        parser.add_argument(
+            "--iterations", type=int,
+            help="Остановиться после стольких сценариев.",
+        )
+        parser.add_argument(
+            "--users", type=int, default=USERS,
+            help="Размер пула тестовых пользователей; 0 — только аноним.",
+        )
+        parser.add_argument("--seed", type=int, help="Для воспроизводимости.")
+        parser.add_argument(
+            "--allow-production", action="store_true",
+            help="Разрешить запуск при DEBUG=False: команда создаёт "
+                 "пользователей в базе, на которую указывают настройки.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["allow_production"]:
+            raise CommandError(
+                "DEBUG выключен: команда создаёт пользователей в рабочей "
+                "базе. Для запуска добавьте --allow-production."
+            )
+        try:
+            loadtest.parse_mix(options["mix"])
+        except ValueError as error:
+            raise CommandError(error)
+        # Пароль живёт только этот прогон и нигде не публикуется.
+        password = secrets.token_urlsafe(16)
+        usernames = self.user_pool(options["users"], password)
+        try:
+            stats = loadtest.run(
+                options["url"],
+                [(username, password) for username in usernames],
+                mix=options["mix"],
+                concurrency=options["concurrency"],
+                duration=options["duration"],
+                iterations=options["iterations"],
+                seed=options["seed"],
+            )
+        finally:
+            self.disable_pool(usernames)
+        self.report(stats.rows())
+
+    @staticmethod
+    def disable_pool(usernames):
+        """Закрывает вход пулу: их посты остаются, а войти под ними
+        после прогона нельзя."""
+        User = get_user_model()
+        for user in User.objects.filter(username__in=usernames):
+            user.is_active = False
+            user.set_unusable_password()
+            # save() вызывает сигналы, сбрасывающие кеш пользователя.
+            user.save(update_fields=["is_active", "password"])
+
+    def user_pool(self, size, password):
+        """Создаёт недостающих тестовых пользователей, задаёт им пароль
+        прогона и подписывает новых на нескольких авторов, чтобы лента
+        подписок не была пустой."""
+        User = get_user_model()
+        authors = list(
+            User.objects.filter(posts__isnull=False)
+            .exclude(username__startswith=USERNAME.format(""))
+            .distinct().values_list("id", flat=True)[:FOLLOWS]
+        )
+        usernames = []
+        for number in range(size):
+            username = USERNAME.format(number)
+            user, created = User.objects.get_or_create(username=username)
+            user.is_active = True
+            user.set_password(password)
+            user.save(update_fields=["is_active", "password"])
+            if created:
+                Follow.objects.bulk_create(
+                    [Follow(user=user, author_id=author_id)
+                     for author_id in authors],
+                    ignore_conflicts=True,
+                )
+            usernames.append(username)
+        return usernames
+
+    def report(self, rows):
+        header = (
+            f"{'endpoint':<14}{'requests':>9}{'rps':>9}{'errors':>8}"
+            + "".join(f"{'p' + str(q) + ' ms':>10}"
+                      for q in loadtest.PERCENTILES)
+            + f"{'max ms':>10}{'ttfb p50':>10}"
+        )
+        self.stdout.write(header)
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<14}{row['requests']:>9}"
+                f"{row['rps']:>9.1f}{row['error_rate']:>8.1%}"
+                + "".join(f"{row['p' + str(q)]:>10.1f}"
+                          for q in loadtest.PERCENTILES)
+                + f"{row['max']:>10.1f}{row['ttfb_p50']:>10.1f}"
+            )
@@ -0,0 +1,65 @@
+import os
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from core import profiling
+
+
+ITERATIONS = 20
+
+
+class Command(BaseCommand):
+    help = "Профилирует адрес сайта на локальной базе, запрашивая его в цикле."
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="Например, /posts/1/ или /follow/.")
+        parser.add_argument(
+            "--user", help="Выполнять запросы от имени этого пользователя.")
+        parser.add_argument(
+            "--iterations", type=int, default=ITERATIONS,
+            help="Сколько раз запросить адрес.",
+        )
+        parser.add_argument(
+            "--mode", choices=profiling.MODES, default="cprofile",
+            help="cprofile — точная статистика, sample — collapsed stacks "
+                 "для flamegraph.",
+        )
+        parser.add_argument(
+            "--clear-cache", action="store_true",
+            help="Очищать кеш перед каждым запросом (для cache_page).",
+        )
+        parser.add_argument(
+            "--output-dir", default=settings.PROFILE_DIR,
+            help="Куда сохранить профиль.",
+        )
+
+    def handle(self, *args, **options):
+        client = Client()
+        if options["user"]:
+            user = get_user_model().objects.filter(
+                username=options["user"]).first()
+            if user is None:
+                raise CommandError(
+                    f"Пользователь {options['user']} не найден.")
+            client.force_login(user)
+
+        def run():
+            for _ in range(options["iterations"]):
+                if options["clear_cache"]:
+                    cache.clear()
+                response = client.get(options["url"])
+                if response.status_code >= 400:
+                    raise CommandError(
+                        f"{options['url']} ответил {response.status_code}.")
+
+        _, profile = profiling.profile_call(run, options["mode"])
+        name = profile.save(options["output_dir"], options["url"])
+        if options["mode"] == "cprofile":
+            self.stdout.write(profile.text)
+        self.stdout.write(self.style.SUCCESS(
+            "Профиль сохранён: "
+            + os.path.join(options["output_dir"], name)))
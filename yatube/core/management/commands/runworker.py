@@ -0,0 +1,39 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = "Выполняет фоновые задачи из очереди core.jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int, default=2,
+            help="Сколько задач выполнять одновременно (потоков).",
+        )
+        parser.add_argument(
+            "--burst", action="store_true",
+            help="Выйти, когда очередь опустеет.",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=1.0,
+            help="Пауза между проверками пустой очереди, в секундах.",
+        )
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        # SIGTERM от supervisor или systemd завершает воркеры так же
+        # аккуратно, как Ctrl-C: текущие задачи доделываются.
+        previous = signal.signal(
+            signal.SIGTERM, lambda signum, frame: stop.set())
+        try:
+            pruned = jobs.run_workers(
+                options["concurrency"], options["burst"],
+                options["interval"], stop,
+            )
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+        self.stdout.write(f"Удалено старых выполненных задач: {pruned}.")
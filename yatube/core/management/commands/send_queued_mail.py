@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import mail
+
+
+class Command(BaseCommand):
+    help = (
+        "Отправляет письма из очереди QueuedEmailBackend через "
+        "QUEUED_EMAIL_BACKEND."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int,
+            default=settings.EMAIL_QUEUE_BATCH_SIZE,
+            help="Сколько писем отправлять за одно соединение.",
+        )
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Работать постоянно, проверяя очередь каждые --interval "
+                 "секунд.",
+        )
+        parser.add_argument("--interval", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.drain(options["batch_size"])
+            if sent or failed or not options["loop"]:
+                self.stdout.write(
+                    f"Отправлено: {sent}, с ошибкой: {failed}.")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
+
+    @staticmethod
+    def drain(batch_size):
+        """Отправляет пачки, пока в очереди есть письма к отправке."""
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = mail.send_queued(batch_size)
+            total_sent += sent
+            total_failed += failed
+            if sent + failed < batch_size:
+                return total_sent, total_failed
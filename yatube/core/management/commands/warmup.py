@@ -0,0 +1,86 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from core.warmup import warm_up
+
+
+URLS = ["/", "/about/author/"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Прогревает шаблоны, URL-резолверы и ленивые импорты и сравнивает "
+        "задержку первого запроса в холодном и прогретом процессе."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url", action="append", dest="urls",
+            help=f"Адрес для замера; по умолчанию {', '.join(URLS)}.",
+        )
+        parser.add_argument(
+            "--no-compare", action="store_true",
+            help="Только прогреть, без замеров в отдельных процессах.",
+        )
+        parser.add_argument(
+            "--probe", choices=("cold", "warm"),
+            help="Внутренний режим: замер в текущем процессе, вывод в JSON.",
+        )
+
+    def handle(self, *args, **options):
+        urls = options["urls"] or URLS
+        if options["probe"]:
+            self.stdout.write(json.dumps(self.probe(options["probe"], urls)))
+            return
+        for name, (result, seconds) in warm_up().items():
+            self.stdout.write(f"{name:<10} {seconds * 1000:8.1f}ms  {result}")
+        if options["no_compare"]:
+            return
+        cold = self.run_probe("cold", urls)
+        warm = self.run_probe("warm", urls)
+        self.stdout.write(f"{'url':<30}{'cold ms':>10}{'warm ms':>10}")
+        for url in urls:
+            self.stdout.write(
+                f"{url:<30}{cold['first'][url]:>10.1f}"
+                f"{warm['first'][url]:>10.1f}")
+        self.stdout.write(f"{'warm-up ms':<30}{'':>10}{warm['warmup']:>10.1f}")
+
+    def probe(self, mode, urls):
+        """Первый запрос к каждому адресу в этом процессе."""
+        warmup = 0.0
+        if mode == "warm":
+            started = time.perf_counter()
+            warm_up()
+            warmup = (time.perf_counter() - started) * 1000
+        client = Client()
+        first = {}
+        for url in urls:
+            started = time.perf_counter()
+            response = client.get(url)
+            first[url] = (time.perf_counter() - started) * 1000
+            if response.status_code >= 400:
+                raise CommandError(f"{url} ответил {response.status_code}.")
+        return {"warmup": warmup, "first": first}
+
+    def run_probe(self, mode, urls):
+        """Замер в свежем процессе: в текущем всё уже прогрето."""
+        command = [
+            sys.executable, os.path.join(settings.BASE_DIR, "manage.py"),
+            "warmup", "--probe", mode,
+        ]
+        for url in urls:
+            command += ["--url", url]
+        result = subprocess.run(
+            command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip())
+        return json.loads(result.stdout.strip().splitlines()[-1])
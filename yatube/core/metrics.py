@@ -0,0 +1,254 @@
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from sorl.thumbnail.base import ThumbnailBackend
+
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def key(self, labels):
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def snapshot(self):
+        with self.lock:
+            samples = [
+                [list(key), value] for key, value in self.samples.items()
+            ]
+        return {
+            "type": self.kind,
+            "help": self.help,
+            "labels": list(self.labels),
+            "samples": samples,
+        }
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    """Гистограмма: счётчики по корзинам (без накопления), сумма
+    и количество наблюдений."""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            sample = self.samples.get(key)
+            if sample is None:
+                sample = [0] * (len(self.buckets) + 1) + [0.0]
+                self.samples[key] = sample
+            sample[index] += 1
+            sample[-1] += value
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot["buckets"] = list(self.buckets)
+        return snapshot
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.flushed = 0.0
+        self.pid = None
+        self.process_id = None
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), **kwargs):
+        return self.register(Histogram(name, help_text, labels, **kwargs))
+
+    def snapshot(self):
+        return {
+            name: metric.snapshot() for name, metric in self.metrics.items()
+        }
+
+    def snapshot_path(self):
+        # После fork pid меняется: каждому процессу — свой файл.
+        pid = os.getpid()
+        if pid != self.pid:
+            self.pid = pid
+            self.process_id = f"{pid}-{uuid.uuid4().hex[:8]}"
+        return os.path.join(settings.METRICS_DIR, f"{self.process_id}.json")
+
+    def flush(self, force=False):
+        """Сохраняет снимок метрик процесса для остальных воркеров
+        не чаще, чем раз в METRICS_FLUSH_INTERVAL секунд."""
+        if not settings.METRICS_DIR:
+            return
+        now = time.monotonic()
+        if not force and now - self.flushed < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self.flushed = now
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = self.snapshot_path()
+        with open(path + ".tmp", "w") as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file)
+        os.replace(path + ".tmp", path)
+
+    def collect(self):
+        """Метрики всех процессов, сложенные вместе."""
+        if not settings.METRICS_DIR:
+            return self.snapshot()
+        self.flush(force=True)
+        snapshots = []
+        for name in sorted(os.listdir(settings.METRICS_DIR)):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(settings.METRICS_DIR, name)
+            try:
+                with open(path) as snapshot_file:
+                    snapshots.append(json.load(snapshot_file))
+            except (OSError, ValueError):
+                continue
+        return merge(snapshots)
+
+
+def merge(snapshots):
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, dict(metric, samples={}))
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                if key not in target["samples"]:
+                    target["samples"][key] = value
+                elif metric["type"] == "histogram":
+                    target["samples"][key] = [
+                        left + right for left, right
+                        in zip(target["samples"][key], value)
+                    ]
+                else:
+                    target["samples"][key] += value
+    for metric in merged.values():
+        metric["samples"] = [
+            [list(key), value] for key, value in metric["samples"].items()
+        ]
+    return merged
+
+
+def escape(value):
+    return (
+        value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+    )
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{%s}" % ",".join(f'{name}="{escape(value)}"'
+                             for name, value in pairs)
+
+
+def render(snapshot):
+    """Текстовый формат экспозиции Prometheus."""
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        labels = metric["labels"]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for values, value in sorted(metric["samples"]):
+            if metric["type"] != "histogram":
+                lines.append(
+                    f"{name}{format_labels(labels, values)} {value}")
+                continue
+            *counts, total = value
+            cumulative = 0
+            bounds = [str(bound) for bound in metric["buckets"]] + ["+Inf"]
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append("%s_bucket%s %s" % (
+                    name,
+                    format_labels(labels, values, [("le", bound)]),
+                    cumulative,
+                ))
+            lines.append(
+                f"{name}_sum{format_labels(labels, values)} {total}")
+            lines.append(
+                f"{name}_count{format_labels(labels, values)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUESTS = registry.counter(
+    "yatube_http_requests_total",
+    "Обработанные запросы.",
+    ("view", "method", "status"),
+)
+LATENCY = registry.histogram(
+    "yatube_http_request_duration_seconds",
+    "Время обработки запроса.",
+    ("view",),
+)
+DB_QUERIES = registry.counter(
+    "yatube_db_queries_total",
+    "Запросы к базе данных.",
+    ("view",),
+)
+CACHE_REQUESTS = registry.counter(
+    "yatube_cache_requests_total",
+    "Обращения к кешу.",
+    ("result",),
+)
+THUMBNAIL_SECONDS = registry.histogram(
+    "yatube_thumbnail_seconds",
+    "Время создания миниатюр sorl.",
+)
+TEMPLATE_RENDERS = registry.counter(
+    "yatube_template_renders_total",
+    "Рендеринги шаблонов, тегов и фильтров (режим профилирования шаблонов).",
+    ("name",),
+)
+TEMPLATE_SECONDS = registry.counter(
+    "yatube_template_render_seconds_total",
+    "Включающее время рендеринга шаблонов, тегов и фильтров.",
+    ("name",),
+)
+
+
+class TimedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, который учитывает время создания миниатюр."""
+
+    def _create_thumbnail(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super()._create_thumbnail(*args, **kwargs)
+        finally:
+            THUMBNAIL_SECONDS.observe(time.perf_counter() - started)
@@ -0,0 +1,191 @@
+import json
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.cache import get_max_age, patch_vary_headers
+
+from . import compression, metrics, profiling, timing
+from .slowlog import SlowQueryWrapper
+
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """Замеряет время представления, SQL, шаблонов и работу кеша
+    и отдаёт их в заголовке Server-Timing и строкой лога.
+
+    Замеряется доля запросов SERVER_TIMING_SAMPLE_RATE, остальные
+    проходят без накладных расходов."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        timings = timing.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timings.sql_wrapper))
+                response = self.get_response(request)
+        finally:
+            timing.stop()
+        if timings.view_started is not None:
+            timings.view_time = time.perf_counter() - timings.view_started
+        response["Server-Timing"] = self.header(timings)
+        match = request.resolver_match
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            **timings.as_dict(),
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = timing.current()
+        if timings is not None:
+            timings.view_started = time.perf_counter()
+
+    @staticmethod
+    def header(timings):
+        return ", ".join((
+            f"total;dur={timings.total_time * 1000:.2f}",
+            f"view;dur={timings.view_time * 1000:.2f}",
+            f'db;dur={timings.sql_time * 1000:.2f};'
+            f'desc="{timings.sql_count} queries"',
+            f"tpl;dur={timings.template_time * 1000:.2f}",
+            f'cache;desc="hit={timings.cache_hits} '
+            f'miss={timings.cache_misses}"',
+        ))
+
+
+class MetricsMiddleware:
+    """Считает каждый запрос в реестре core.metrics: число запросов,
+    задержку и обращения к базе по имени маршрута."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = [0]
+
+        def count_queries(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(count_queries))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        # Только имена маршрутов: сырые пути раздули бы число рядов.
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        metrics.REQUESTS.inc(
+            view=view, method=request.method, status=response.status_code)
+        metrics.LATENCY.observe(duration, view=view)
+        metrics.DB_QUERIES.inc(queries[0], view=view)
+        metrics.registry.flush()
+        return response
+
+
+class SlowQueryMiddleware:
+    """Передаёт медленные запросы к базе в core.slowlog вместе
+    с представлением, местом в коде и планом выполнения."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(
+                    SlowQueryWrapper(connection, request)))
+            return self.get_response(request)
+
+
+class ProfilingMiddleware:
+    """Профилирует запрос сотрудника по ?profile=cprofile|sample или
+    заголовку X-Profile. Профиль сохраняется в PROFILE_DIR, а вместо
+    страницы возвращается его текст."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = request.GET.get("profile") or request.META.get(
+            "HTTP_X_PROFILE")
+        if mode not in profiling.MODES or not request.user.is_staff:
+            return self.get_response(request)
+        response, profile = profiling.profile_call(
+            lambda: self.get_response(request), mode)
+        match = request.resolver_match
+        name = profile.save(
+            settings.PROFILE_DIR, match.view_name if match else "unresolved")
+        logger.info("Профиль %s сохранён в %s", request.path, name)
+        profile_response = HttpResponse(
+            profile.text, content_type="text/plain; charset=utf-8")
+        profile_response["X-Profile-File"] = name
+        profile_response["X-Profiled-Status"] = response.status_code
+        return profile_response
+
+
+class CompressionMiddleware:
+    """Минифицирует HTML и сжимает текстовые ответы в br или gzip.
+
+    Ответы меньше COMPRESS_MIN_SIZE не сжимаются. Тела страниц с max-age
+    (например, из cache_page) хранятся в кеше уже сжатыми."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = response.get("Content-Type", "")
+        if (response.status_code != 200
+                or response.has_header("Content-Encoding")
+                or not compression.is_compressible(content_type)):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = compression.choose_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING"))
+        if response.streaming:
+            length = response.get("Content-Length")
+            if encoding is None or (
+                    length and int(length) < settings.COMPRESS_MIN_SIZE):
+                return response
+            response.streaming_content = compression.compress_stream(
+                response.streaming_content, encoding)
+            del response["Content-Length"]
+        else:
+            body, encoding = compression.encode_body(
+                response.content, content_type, response.charset, encoding,
+                self.cache_timeout(response))
+            response.content = body
+            response["Content-Length"] = str(len(body))
+            if encoding is None:
+                return response
+        if response.has_header("ETag"):
+            # Сжатое тело не совпадает побайтно с исходным.
+            response["ETag"] = re.sub(r'^"', 'W/"', response["ETag"])
+        response["Content-Encoding"] = encoding
+        return response
+
+    @staticmethod
+    def cache_timeout(response):
+        if "private" in response.get("Cache-Control", ""):
+            return None
+        return get_max_age(response)
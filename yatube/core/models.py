@@ -0,0 +1,77 @@
+from django.db import models
+from django.utils import timezone
+
+
+class QueuedEmail(models.Model):
+    """Письмо, ожидающее отправки командой send_queued_mail."""
+
+    QUEUED = "queued"
+    FAILED = "failed"
+    STATUSES = (
+        (QUEUED, "В очереди"),
+        (FAILED, "Не отправлено"),
+    )
+
+    # EmailMessage целиком (pickle): так сохраняются вложения
+    # и альтернативные части.
+    message = models.BinaryField()
+    subject = models.CharField(max_length=255, blank=True)
+    recipients = models.TextField(blank=True)
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    next_attempt = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt"], name="email_due_idx"),
+        ]
+        verbose_name = "Письмо в очереди"
+        verbose_name_plural = "Очередь писем"
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipients}"
+
+
+class Job(models.Model):
+    """Фоновая задача из core.jobs, её выполняет manage.py runworker."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (QUEUED, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Выполнена"),
+        (FAILED, "Не выполнена"),
+    )
+
+    name = models.CharField(max_length=100)
+    # Аргументы задачи в JSON: {"args": [...], "kwargs": {...}}.
+    payload = models.TextField(default="{}")
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+    # Когда задачу можно брать: время следующей попытки, а у
+    # выполняющейся — срок, после которого она считается брошенной.
+    run_at = models.DateTimeField(default=timezone.now)
+    created = models.DateTimeField(default=timezone.now)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="job_due_idx"),
+            models.Index(fields=["finished"], name="job_finished_idx"),
+        ]
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,101 @@
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+
+MODES = ("cprofile", "sample")
+STATS_LIMIT = 40
+
+
+def frame_stack(frame):
+    """Стек кадра в формате collapsed stacks: от корня к листу через ;."""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        filename = os.path.basename(code.co_filename)
+        stack.append(f"{code.co_name} ({filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class Sampler:
+    """Семплирующий профилировщик одного потока: раз в interval секунд
+    запоминает его стек. Результат читают flamegraph.pl и speedscope."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.running = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while self.running.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[frame_stack(frame)] += 1
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.running.set()
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.running.clear()
+        self.thread.join()
+
+    def collapsed(self):
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+class Profile:
+    """Результат профилирования: текст для ответа и файл для хранения."""
+
+    def __init__(self, mode, text, data, extension):
+        self.mode = mode
+        self.text = text
+        self.data = data
+        self.extension = extension
+
+    def save(self, directory, label):
+        os.makedirs(directory, exist_ok=True)
+        name = "{}-{}.{}".format(
+            time.strftime("%Y%m%d-%H%M%S"),
+            "".join(char if char.isalnum() else "_" for char in label),
+            self.extension,
+        )
+        with open(os.path.join(directory, name), "wb") as profile_file:
+            profile_file.write(self.data)
+        return name
+
+
+def profile_call(func, mode):
+    """Выполняет func под профилировщиком, возвращает (результат, Profile)."""
+    if mode == "sample":
+        with Sampler(
+            threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL
+        ) as sampler:
+            result = func()
+        text = sampler.collapsed()
+        return result, Profile(mode, text, text.encode(), "folded")
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func)
+    # Сериализуем до pstats.Stats: он забирает статистику у профилировщика.
+    # Тот же формат, что у dump_stats(): его читают snakeviz и flameprof.
+    profiler.create_stats()
+    data = marshal.dumps(profiler.stats)
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats(
+        "cumulative").print_stats(STATS_LIMIT)
+    return result, Profile(mode, output.getvalue(), data, "prof")
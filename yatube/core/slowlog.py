@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+MAX_PARAMS_LENGTH = 500
+INSTRUMENTATION_FILES = {
+    os.path.abspath(__file__.replace(".pyc", ".py")),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "middleware.py"),
+}
+FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def normalize(sql):
+    """SQL без конкретных значений: одинаковые запросы с разными
+    параметрами и длиной списков IN дают одну строку."""
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(sql):
+    return hashlib.md5(normalize(sql).encode()).hexdigest()[:12]
+
+
+def caller():
+    """Ближайшая к запросу строка кода проекта, а не Django."""
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        path = os.path.abspath(frame.filename)
+        if (
+            path.startswith(settings.BASE_DIR)
+            and "site-packages" not in path
+            and path not in INSTRUMENTATION_FILES
+        ):
+            relative = os.path.relpath(path, settings.BASE_DIR)
+            return f"{relative}:{frame.lineno} in {frame.name}"
+    return None
+
+
+class SlowQueryLog:
+    """Медленные запросы, сгруппированные по отпечатку SQL
+    (в пределах процесса)."""
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def record(self, sql, params, duration, view, location, explain):
+        key = fingerprint(sql)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = {
+                    "fingerprint": key,
+                    "sql": normalize(sql),
+                    "count": 0,
+                    "total_time": 0.0,
+                    "max_time": 0.0,
+                    "plan": None,
+                }
+            entry["count"] += 1
+            entry["total_time"] += duration
+            slowest = duration >= entry["max_time"]
+            if slowest:
+                entry["max_time"] = duration
+                entry.update(
+                    example=sql,
+                    params=repr(params)[:MAX_PARAMS_LENGTH],
+                    view=view,
+                    location=location,
+                )
+        # План нужен один раз на отпечаток и для самого медленного случая.
+        if slowest or entry["plan"] is None:
+            entry["plan"] = explain()
+        return entry
+
+    def report(self):
+        with self.lock:
+            entries = [dict(entry) for entry in self.entries.values()]
+        return sorted(
+            entries, key=lambda entry: entry["total_time"], reverse=True)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+slow_queries = SlowQueryLog()
+
+
+def explain(connection, sql, params):
+    if not sql.lstrip().upper().startswith("SELECT"):
+        return None
+    prefix = (
+        "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    )
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except Exception as error:
+        return f"EXPLAIN не удался: {error}"
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+class SlowQueryWrapper:
+    """Обёртка для connection.execute_wrapper(): пишет в лог и в отчёт
+    запросы дольше SLOW_QUERY_THRESHOLD секунд."""
+
+    def __init__(self, connection, request):
+        self.connection = connection
+        self.request = request
+        self.explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.explaining:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= settings.SLOW_QUERY_THRESHOLD:
+                self.slow(sql, params, many, duration)
+
+    def slow(self, sql, params, many, duration):
+        match = self.request.resolver_match
+        view = match.view_name if match else None
+        location = caller()
+        logger.warning(
+            "Медленный запрос %.1f мс (%s, %s): %s %r",
+            duration * 1000, view, location, sql, params,
+        )
+
+        def run_explain():
+            if many:
+                return None
+            self.explaining = True
+            try:
+                return explain(self.connection, sql, params)
+            finally:
+                self.explaining = False
+
+        slow_queries.record(sql, params, duration, view, location, run_explain)
@@ -0,0 +1,106 @@
+"""Статика с хешем в имени и заранее сжатыми копиями.
+
+collectstatic кладёт в STATIC_ROOT файлы вида bootstrap.min.<хеш>.css
+и рядом bootstrap.min.<хеш>.css.gz и .br. core.views.serve_static
+выбирает копию по Accept-Encoding, а хешированным именам отдаёт
+Cache-Control с immutable.
+"""
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from .compression import accepted_encodings, brotli_compress, gzip_compress
+
+
+COMPRESSIBLE_EXTENSIONS = (
+    ".css", ".js", ".map", ".svg", ".ico", ".html", ".txt", ".json", ".xml",
+)
+# Меньшие файлы сжатие почти не уменьшает.
+MIN_COMPRESS_SIZE = 256
+ENCODINGS = (
+    # (Content-Encoding, суффикс файла) в порядке предпочтения.
+    ("br", ".br"),
+    ("gzip", ".gz"),
+)
+
+
+# Статика сжимается один раз при сборке, поэтому с максимальным уровнем.
+COMPRESSORS = {".gz": gzip_compress, ".br": brotli_compress}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def __init__(self, *args, **kwargs):
+        # В продакшене файл, которого нет в манифесте, — ошибка, как
+        # у Django по умолчанию; без манифеста (разработка) {% static %}
+        # ссылается на исходное имя.
+        self.manifest_strict = settings.STATIC_MANIFEST_STRICT
+        self._hashed_names = None
+        super().__init__(*args, **kwargs)
+
+    @property
+    def hashed_names(self):
+        """Множество хешированных имён манифеста, строится один раз."""
+        if self._hashed_names is None:
+            self._hashed_names = frozenset(self.hashed_files.values())
+        return self._hashed_names
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        try:
+            for name, hashed_name, processed in super().post_process(
+                    paths, dry_run, **options):
+                if isinstance(hashed_name, str):
+                    hashed_names.add(hashed_name)
+                yield name, hashed_name, processed
+        finally:
+            # Манифест собран заново.
+            self._hashed_names = None
+        if dry_run:
+            return
+        for name in sorted(hashed_names):
+            for compressed_name in self.compress(name):
+                yield name, compressed_name, True
+
+    def compress(self, name):
+        """Пишет рядом с файлом сжатые копии, если они заметно меньше."""
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        path = self.path(name)
+        with open(path, "rb") as original:
+            data = original.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compressor in COMPRESSORS.items():
+            compressed = compressor(data)
+            if len(compressed) >= len(data) * 0.95:
+                continue
+            with open(path + suffix, "wb") as output:
+                output.write(compressed)
+            yield name + suffix
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if self.manifest_strict:
+                raise
+            # Файла нет ни в манифесте, ни на диске: ссылаемся на
+            # исходное имя, а не роняем страницу.
+            return name
+
+
+def is_hashed(storage, name):
+    """Есть ли name среди хешированных имён из манифеста."""
+    return name in storage.hashed_names
+
+
+def negotiate(fullpath, accept_encoding):
+    """Путь к лучшей сжатой копии, которую принимает клиент, и её
+    Content-Encoding; (fullpath, None), если такой нет."""
+    accepted = accepted_encodings(accept_encoding)
+    for encoding, suffix in ENCODINGS:
+        if (encoding in accepted or "*" in accepted) and os.path.isfile(
+                fullpath + suffix):
+            return fullpath + suffix, encoding
+    return fullpath, None
@@ -0,0 +1,9 @@
+"""Небольшие статистические помощники для отчётов."""
+
+
+def percentile(values, q):
+    """Перцентиль по отсортированному списку (метод ближайшего ранга)."""
+    if not values:
+        return 0.0
+    index = max(int(round(q / 100 * len(values))) - 1, 0)
+    return values[min(index, len(values) - 1)]
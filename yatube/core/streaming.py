@@ -0,0 +1,38 @@
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+
+STREAM_MARKER = "<!--stream-->"
+
+
+def stream_render(request, template_name, context, items, item_template,
+                  item_name, using=None):
+    """Потоковый аналог render() для страниц с длинным списком.
+
+    Страница рендерится один раз с маркером STREAM_MARKER на месте списка
+    (шаблон выводит {{ stream_marker }} вместо цикла). Клиент сразу
+    получает всё, что до маркера, затем элементы по одному, затем хвост.
+    В памяти не копится ни весь список, ни весь HTML.
+
+    Шаблону элемента доступен forloop с first и counter, как в цикле.
+    using — движок шаблонов, как у render()."""
+    page = render_to_string(
+        template_name,
+        {**context, "stream_marker": mark_safe(STREAM_MARKER)},
+        request,
+        using=using,
+    )
+    head, tail = page.split(STREAM_MARKER, 1)
+    # Элементам не нужны контекстные процессоры: рендерим без request.
+    template = get_template(item_template, using=using)
+
+    def generate():
+        yield head
+        for counter, item in enumerate(items, 1):
+            forloop = {"first": counter == 1, "counter": counter}
+            yield template.render(
+                {**context, item_name: item, "forloop": forloop})
+        yield tail
+
+    return StreamingHttpResponse(generate())
@@ -0,0 +1,9 @@
+from .jobs import task
+from .mail import send_queued
+
+
+@task("core.send_queued_mail")
+def send_queued_mail():
+    """Отправляет очередь писем, пока в ней есть что отправлять."""
+    while sum(send_queued()):
+        pass
@@ -0,0 +1,92 @@
+import time
+
+from django.template import base
+
+from . import metrics, timing
+
+
+TOP_TEMPLATES = 10
+_originals = {}
+
+
+def record(kind, name, duration):
+    """Учитывает время шаблона, тега или фильтра: в счётчиках текущего
+    запроса и в общих метриках процесса."""
+    key = f"{kind}:{name}"
+    metrics.TEMPLATE_RENDERS.inc(name=key)
+    metrics.TEMPLATE_SECONDS.inc(duration, name=key)
+    timings = timing.current()
+    if timings is not None:
+        stats = timings.template_stats.setdefault(key, [0, 0.0])
+        stats[0] += 1
+        stats[1] += duration
+
+
+def node_name(node):
+    """Имя тега по классу узла: URLNode -> url, IncludeNode -> include."""
+    name = type(node).__name__
+    if name.endswith("Node"):
+        name = name[:-len("Node")]
+    return name.lower()
+
+
+def filter_names(expression):
+    return "|".join(
+        getattr(func, "_filter_name", func.__name__)
+        for func, _ in expression.filters
+    )
+
+
+def timed(method, kind, describe, skip=None):
+    def wrapper(self, *args, **kwargs):
+        if skip is not None and skip(self):
+            return method(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            record(kind, describe(self), time.perf_counter() - started)
+    return wrapper
+
+
+def install():
+    """Включает учёт времени для каждого шаблона (в том числе include
+    и extends), каждого тега и каждой цепочки фильтров.
+
+    Время — включающее: for учитывает всё своё тело, include — время
+    подключённого шаблона."""
+    if _originals:
+        return
+    _originals.update({
+        (base.Template, "_render"): base.Template._render,
+        (base.Node, "render_annotated"): base.Node.render_annotated,
+        (base.FilterExpression, "resolve"): base.FilterExpression.resolve,
+    })
+    base.Template._render = timed(
+        base.Template._render, "template",
+        lambda template: template.origin.template_name or template.name,
+    )
+    base.Node.render_annotated = timed(
+        base.Node.render_annotated, "tag", node_name,
+        # Текст и переменные — не теги, переменные учтены через фильтры.
+        skip=lambda node: isinstance(node, (base.TextNode, base.VariableNode)),
+    )
+    base.FilterExpression.resolve = timed(
+        base.FilterExpression.resolve, "filter", filter_names,
+        skip=lambda expression: not expression.filters,
+    )
+
+
+def uninstall():
+    for (owner, attribute), original in _originals.items():
+        setattr(owner, attribute, original)
+    _originals.clear()
+
+
+def top(template_stats, limit=TOP_TEMPLATES):
+    ranked = sorted(
+        template_stats.items(), key=lambda item: item[1][1], reverse=True)
+    return {
+        key: {"count": count, "ms": round(duration * 1000, 2)}
+        for key, (count, duration) in ranked[:limit]
+    }
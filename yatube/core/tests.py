@@ -1,6 +1,46 @@
+import gzip
+import json
+import os
+import pstats
+import shutil
+import signal
+import tempfile
+import threading
+from datetime import timedelta
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
-from django.test import Client, TestCase
+import brotli
+
+from django.conf import settings
+from django.core import mail as outbox
+from django.core.cache import cache
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import CommandError, call_command
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import (
+    Client, LiveServerTestCase, TestCase, TransactionTestCase,
+    override_settings,
+)
+from django.template import Context, Template
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from core import (
+    compression, jobs, loadtest, mail, metrics, slowlog, stats,
+    template_profiling, urlcache, warmup,
+)
+from core.models import Job, QueuedEmail
+from core.staticfiles import CompressedManifestStaticFilesStorage, is_hashed
+from posts.models import Group, Post
+
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
 class ViewTestClass(TestCase):
@@ -12,3 +52,719 @@ class ViewTestClass(TestCase):
         response = self.client.get("/nonexist-page/")
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, "core/404.html")
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, "posts"), exist_ok=True)
+        cls.path = os.path.join(TEMP_MEDIA_ROOT, "posts", "image.gif")
+        with open(cls.path, "wb") as media:
+            media.write(b"0123456789")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_full_file(self):
+        """Файл отдаётся целиком с заголовками кеширования."""
+        response = self.client.get("/media/posts/image.gif")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        self.assertEqual(response["Content-Type"], "image/gif")
+        self.assertIn("immutable", response["Cache-Control"])
+
+    def test_range(self):
+        """Заголовок Range возвращает часть файла."""
+        ranges = {
+            "bytes=2-4": (b"234", "bytes 2-4/10"),
+            "bytes=7-": (b"789", "bytes 7-9/10"),
+            "bytes=-2": (b"89", "bytes 8-9/10"),
+        }
+        for header, (content, content_range) in ranges.items():
+            with self.subTest(header=header):
+                response = self.client.get(
+                    "/media/posts/image.gif", HTTP_RANGE=header)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.PARTIAL_CONTENT)
+                self.assertEqual(
+                    b"".join(response.streaming_content), content)
+                self.assertEqual(response["Content-Range"], content_range)
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(
+            "/media/posts/image.gif", HTTP_RANGE="bytes=20-")
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_not_modified(self):
+        """Неизменённый файл не передаётся повторно."""
+        response = self.client.get(
+            "/media/posts/image.gif",
+            HTTP_IF_MODIFIED_SINCE=http_date(os.path.getmtime(self.path)),
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_outside_media_root(self):
+        response = self.client.get("/media/../settings.py")
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    @override_settings(MEDIA_SENDFILE="x-accel-redirect")
+    def test_accel_redirect(self):
+        """Байты отдаёт nginx, а не Django."""
+        response = self.client.get("/media/posts/image.gif")
+        self.assertEqual(
+            response["X-Accel-Redirect"], "/protected-media/posts/image.gif")
+        self.assertEqual(response.content, b"")
+
+    @override_settings(MEDIA_SENDFILE="x-sendfile")
+    def test_sendfile(self):
+        response = self.client.get("/media/posts/image.gif")
+        self.assertEqual(response["X-Sendfile"], self.path)
+
+
+class StaticFilesTest(TestCase):
+    def setUp(self):
+        source = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        for directory in (source, root):
+            self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        os.makedirs(os.path.join(source, "css"))
+        with open(os.path.join(source, "css", "site.css"), "w") as css:
+            css.write("body { color: black; }\n" * 100)
+        with open(os.path.join(source, "robots.txt"), "w") as robots:
+            robots.write("tiny")
+        overrides = override_settings(
+            STATICFILES_DIRS=[source], STATIC_ROOT=root,
+            # Статику админки здесь собирать незачем.
+            STATICFILES_FINDERS=[
+                "django.contrib.staticfiles.finders.FileSystemFinder",
+            ],
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+        from django.contrib.staticfiles.storage import staticfiles_storage
+
+        self.hashed = staticfiles_storage.stored_name("css/site.css")
+        self.root = root
+
+    def get(self, path, encoding=None):
+        extra = {"HTTP_ACCEPT_ENCODING": encoding} if encoding else {}
+        return self.client.get(settings.STATIC_URL + path, **extra)
+
+    def test_build_creates_hashed_and_compressed_files(self):
+        """collectstatic пишет хешированные имена и сжатые копии."""
+        self.assertRegex(self.hashed, r"^css/site\.[0-9a-f]{12}\.css$")
+        for suffix in ("", ".gz", ".br"):
+            self.assertTrue(
+                os.path.exists(os.path.join(self.root, self.hashed + suffix)))
+        # Маленькие файлы не сжимаются.
+        self.assertFalse(os.path.exists(
+            os.path.join(self.root, "robots.txt.gz")))
+
+    def test_is_hashed(self):
+        """Хешированными считаются только имена из манифеста."""
+        from django.contrib.staticfiles.storage import staticfiles_storage
+
+        self.assertTrue(is_hashed(staticfiles_storage, self.hashed))
+        self.assertFalse(is_hashed(staticfiles_storage, "css/site.css"))
+
+    def test_missing_file_raises_in_strict_mode(self):
+        """Файл не из манифеста в строгом режиме — ошибка, иначе
+        ссылка на исходное имя."""
+        with override_settings(STATIC_MANIFEST_STRICT=True):
+            with self.assertRaises(ValueError):
+                CompressedManifestStaticFilesStorage().stored_name(
+                    "css/missing.css")
+        with override_settings(STATIC_MANIFEST_STRICT=False):
+            self.assertEqual(
+                CompressedManifestStaticFilesStorage().stored_name(
+                    "css/missing.css"),
+                "css/missing.css",
+            )
+
+    def test_precompressed_variant_is_negotiated(self):
+        """Отдаётся лучшая сжатая копия, которую принимает клиент."""
+        cases = (("gzip, deflate, br", "br"), ("gzip", "gzip"), (None, None))
+        for accept, encoding in cases:
+            with self.subTest(accept=accept):
+                response = self.get(self.hashed, accept)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(response.get("Content-Encoding"), encoding)
+                self.assertEqual(response["Content-Type"], "text/css")
+                self.assertEqual(response["Vary"], "Accept-Encoding")
+        body = b"".join(self.get(self.hashed).streaming_content)
+        self.assertIn(b"color: black", body)
+
+    def test_cache_headers(self):
+        """Хешированные имена кешируются навсегда, исходные — нет."""
+        self.assertIn("immutable", self.get(self.hashed)["Cache-Control"])
+        self.assertEqual(
+            self.get("css/site.css")["Cache-Control"],
+            "public, max-age=0, must-revalidate",
+        )
+        self.assertEqual(
+            self.get("missing.css").status_code, HTTPStatus.NOT_FOUND)
+
+    def test_static_tag_uses_hashed_name(self):
+        """{% static %} ссылается на хешированное имя."""
+        rendered = Template(
+            '{% load static %}{% static "css/site.css" %}').render(Context())
+        self.assertEqual(rendered, settings.STATIC_URL + self.hashed)
+
+
+class CompressionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username="author")
+        Post.objects.bulk_create(
+            Post(author=author, text=f"Пост {number}") for number in range(5))
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, encoding=None):
+        extra = {"HTTP_ACCEPT_ENCODING": encoding} if encoding else {}
+        return self.client.get(reverse("posts:index"), **extra)
+
+    def test_minify_html(self):
+        """Отступы схлопываются, pre, textarea и пробелы в строке целы."""
+        html = (
+            "<div>\n    <p>a  b&nbsp;\xa0c</p>\n\n    <pre>\n  x\n</pre>"
+            "\n  <textarea>\n  y</textarea>\n</div>\n"
+        )
+        self.assertEqual(
+            compression.minify_html(html),
+            "<div>\n<p>a  b&nbsp;\xa0c</p>\n<pre>\n  x\n</pre>"
+            "\n<textarea>\n  y</textarea>\n</div>",
+        )
+
+    def test_encoding_is_negotiated(self):
+        """br предпочтительнее gzip; без Accept-Encoding тело
+        только минифицируется."""
+        plain = self.get().content
+        self.assertNotIn(b"\n  ", plain)
+        self.assertIn("Пост 4".encode(), plain)
+        cases = (
+            ("gzip, deflate, br", "br", brotli.decompress),
+            ("gzip", "gzip", gzip.decompress),
+            ("gzip;q=0, identity", None, bytes),
+        )
+        for accept, encoding, decompress in cases:
+            with self.subTest(accept=accept):
+                response = self.get(accept)
+                self.assertEqual(response.get("Content-Encoding"), encoding)
+                self.assertIn("Accept-Encoding", response["Vary"])
+                self.assertEqual(
+                    int(response["Content-Length"]), len(response.content))
+                self.assertEqual(decompress(response.content), plain)
+
+    @override_settings(COMPRESS_MIN_SIZE=10 ** 6)
+    def test_small_responses_are_not_compressed(self):
+        self.assertIsNone(self.get("br").get("Content-Encoding"))
+
+    def test_cached_page_is_compressed_once(self):
+        """Повторные попадания в cache_page берут сжатое тело из кеша."""
+        with mock.patch(
+            "core.compression.compress", wraps=compression.compress
+        ) as compress:
+            bodies = {self.get("br").content for _ in range(3)}
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(len(bodies), 1)
+
+    @override_settings(STREAM_FEEDS=True)
+    def test_streaming_response(self):
+        """Потоковая лента сжимается по кускам."""
+        response = self.get("gzip")
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        body = gzip.decompress(b"".join(response.streaming_content))
+        self.assertIn("Пост 4".encode(), body)
+
+
+@override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+class ServerTimingMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_server_timing_header(self):
+        """Замеренный запрос получает Server-Timing и строку лога."""
+        with self.assertLogs("core.middleware", "INFO") as logs:
+            response = self.client.get("/")
+        header = response["Server-Timing"]
+        for metric in ("total;dur=", "view;dur=", "db;dur=", "tpl;dur="):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, header)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["view"], "posts:index")
+        self.assertGreater(record["sql_count"], 0)
+        self.assertGreater(record["template_ms"], 0)
+
+    def test_cache_hits_are_counted(self):
+        self.client.get("/")
+        response = self.client.get("/")
+        self.assertIn('cache;desc="hit=', response["Server-Timing"])
+        self.assertNotIn("hit=0", response["Server-Timing"])
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        response = self.client.get("/")
+        self.assertFalse(response.has_header("Server-Timing"))
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username="staff", is_staff=True)
+        self.client.force_login(self.staff)
+
+    def test_metrics_only_for_staff(self):
+        self.client.logout()
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_requests_are_counted(self):
+        """Запросы учитываются по имени маршрута."""
+        self.client.get(reverse("about:author"))
+        text = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn(
+            'yatube_http_requests_total{view="about:author",'
+            'method="GET",status="200"}', text)
+        self.assertIn(
+            'yatube_http_request_duration_seconds_bucket'
+            '{view="about:author",le="+Inf"}', text)
+
+    def test_workers_are_merged(self):
+        """Снимки других процессов складываются с текущими."""
+        other = metrics.Registry()
+        other.counter("yatube_test_total", "Тест.", ("kind",)).inc(
+            3, kind="a")
+        other.histogram("yatube_test_seconds", "Тест.").observe(0.2)
+        mine = metrics.Registry()
+        mine.counter("yatube_test_total", "Тест.", ("kind",)).inc(
+            2, kind="a")
+        mine.histogram("yatube_test_seconds", "Тест.").observe(20)
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(METRICS_DIR=directory):
+                other.flush(force=True)
+                text = metrics.render(mine.collect())
+        self.assertIn('yatube_test_total{kind="a"} 5', text)
+        self.assertIn('yatube_test_seconds_bucket{le="0.25"} 1', text)
+        self.assertIn('yatube_test_seconds_bucket{le="+Inf"} 2', text)
+        self.assertIn("yatube_test_seconds_count 2", text)
+
+
+class SlowQueryLogTest(TestCase):
+    def setUp(self):
+        slowlog.slow_queries.clear()
+        cache.clear()
+
+    def tearDown(self):
+        slowlog.slow_queries.clear()
+
+    def test_fingerprint_ignores_values(self):
+        """Запросы с разными значениями дают один отпечаток."""
+        self.assertEqual(
+            slowlog.fingerprint("SELECT * FROM t WHERE id IN (%s, %s)"),
+            slowlog.fingerprint("SELECT * FROM t WHERE id IN (%s)"),
+        )
+        self.assertEqual(
+            slowlog.normalize("SELECT 'a''b', 42  FROM t"),
+            "SELECT ?, ? FROM t",
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_slow_queries_are_explained(self):
+        """Медленный запрос попадает в отчёт с представлением и планом."""
+        with self.assertLogs("core.slowlog", "WARNING"):
+            self.client.get(reverse("posts:index"))
+        entries = [
+            entry for entry in slowlog.slow_queries.report()
+            if "posts_post" in entry["sql"]
+        ]
+        self.assertTrue(entries)
+        self.assertEqual(entries[0]["view"], "posts:index")
+        self.assertIn("posts_post", entries[0]["plan"])
+
+    def test_report_only_for_staff(self):
+        response = self.client.get(reverse("slow_queries"))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        staff = User.objects.create_user(username="staff", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse("slow_queries"))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class ProfilingTest(TestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir, ignore_errors=True)
+        self.staff = User.objects.create_user(username="staff", is_staff=True)
+
+    def test_guest_cannot_profile(self):
+        response = self.client.get("/about/author/", {"profile": "cprofile"})
+        self.assertTemplateUsed(response, "about/author.html")
+        self.assertFalse(response.has_header("X-Profile-File"))
+
+    def profile(self, mode):
+        self.client.force_login(self.staff)
+        with override_settings(PROFILE_DIR=self.profile_dir):
+            response = self.client.get("/about/author/", HTTP_X_PROFILE=mode)
+        return response, os.path.join(
+            self.profile_dir, response["X-Profile-File"])
+
+    def test_staff_gets_cprofile(self):
+        """Сохранённый .prof читается pstats и содержит представление."""
+        response, path = self.profile("cprofile")
+        self.assertIn("function calls", response.content.decode())
+        functions = {name for _, _, name in pstats.Stats(path).stats}
+        self.assertIn("render_to_response", functions)
+
+    def test_staff_gets_samples(self):
+        """Файл семплов совпадает с ответом и имеет формат
+        collapsed stacks."""
+        response, path = self.profile("sample")
+        with open(path, "rb") as profile_file:
+            self.assertEqual(profile_file.read(), response.content)
+        for line in response.content.decode().splitlines():
+            self.assertRegex(line, r"^\S.* \d+$")
+
+    def test_profile_url_command(self):
+        call_command(
+            "profile_url", "/about/tech/", iterations=2, mode="sample",
+            output_dir=self.profile_dir, stdout=StringIO(),
+        )
+        self.assertEqual(len(os.listdir(self.profile_dir)), 1)
+
+
+@override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+class TemplateProfilingTest(TestCase):
+    def setUp(self):
+        template_profiling.install()
+        self.addCleanup(template_profiling.uninstall)
+        cache.clear()
+
+    def test_templates_tags_and_filters_are_timed(self):
+        """Учитываются шаблоны, include, теги и фильтры."""
+        user = User.objects.create_user(username="author")
+        Post.objects.create(author=user, text="Тестовый пост")
+        self.client.force_login(user)
+        with self.assertLogs("core.middleware", "INFO") as logs:
+            self.client.get(reverse("posts:index"))
+        templates = json.loads(logs.records[0].getMessage())["templates"]
+        self.assertIn("template:posts/index.html", templates)
+        self.client.get(reverse("posts:post_create"))
+        names = {
+            labels[0] for labels, _ in metrics.registry.snapshot()[
+                "yatube_template_renders_total"]["samples"]
+        }
+        for key in ("template:posts/includes/post.html", "tag:url",
+                    "tag:include", "filter:date", "filter:addclass"):
+            with self.subTest(key=key):
+                self.assertIn(key, names)
+
+    def test_renders_are_aggregated(self):
+        self.client.get(reverse("about:author"))
+        text = metrics.render(metrics.registry.snapshot())
+        self.assertIn(
+            'yatube_template_renders_total{name="template:about/author.html"}',
+            text)
+
+
+class LoadTestTest(LiveServerTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        author = User.objects.create_user(username="author")
+        group = Group.objects.create(title="Группа", slug="group")
+        Post.objects.create(author=author, text="Пост", group=group)
+
+    def test_percentile(self):
+        """Перцентиль берётся по ближайшему рангу."""
+        values = list(range(1, 101))
+        self.assertEqual(stats.percentile(values, 50), 50)
+        self.assertEqual(stats.percentile(values, 99), 99)
+        self.assertEqual(stats.percentile([], 90), 0.0)
+
+    def test_unknown_scenario(self):
+        """Неизвестный сценарий в смеси — ошибка."""
+        with self.assertRaises(ValueError):
+            loadtest.parse_mix("index:1,nope:2")
+
+    def test_scenarios_run_without_errors(self):
+        """Все сценарии проходят против живого сервера без ошибок."""
+        out = StringIO()
+        call_command(
+            "loadtest", self.live_server_url, "--users", "1",
+            "--concurrency", "1", "--iterations", "30", "--seed", "1",
+            "--mix", ",".join(loadtest.SCENARIOS), "--allow-production",
+            stdout=out,
+        )
+        rows = out.getvalue().splitlines()
+        self.assertTrue(rows[0].startswith("endpoint"))
+        total = rows[-1].split()
+        self.assertEqual(total[0], "total")
+        self.assertEqual(total[3], "0.0%")
+        self.assertTrue(Post.objects.filter(
+            author__username="loadtest_0").exists())
+        # После прогона под пользователями пула войти нельзя.
+        pool_user = User.objects.get(username="loadtest_0")
+        self.assertFalse(pool_user.is_active)
+        self.assertFalse(pool_user.has_usable_password())
+
+    def test_refuses_without_debug(self):
+        """Без DEBUG и --allow-production пользователи не создаются."""
+        with self.assertRaisesMessage(CommandError, "--allow-production"):
+            call_command("loadtest", self.live_server_url, stdout=StringIO())
+        self.assertFalse(
+            User.objects.filter(username__startswith="loadtest_").exists())
+
+
+class UrlCacheTest(TestCase):
+    def test_same_urls_as_reverse(self):
+        """fast_reverse даёт те же адреса, что и reverse."""
+        cases = (
+            ("posts:index", ()),
+            ("users:login", ()),
+            ("posts:post_detail", (7,)),
+            ("posts:profile", ("имя с пробелом%",)),
+            ("posts:group_list", ("slug",)),
+        )
+        for viewname, args in cases:
+            with self.subTest(viewname=viewname):
+                expected = reverse(viewname, args=args)
+                self.assertEqual(urlcache.fast_reverse(viewname, *args),
+                                 expected)
+                self.assertEqual(urlcache.fast_reverse(viewname, *args),
+                                 expected)
+
+    def test_invalid_arguments(self):
+        """Неподходящие аргументы дают ту же ошибку, что и reverse."""
+        with self.assertRaises(NoReverseMatch):
+            urlcache.fast_reverse("posts:post_detail", "abc")
+
+    def test_template_tag(self):
+        """{% fast_url %} выводит экранированный адрес."""
+        template = Template(
+            '{% load fast_urls %}{% fast_url "posts:profile" name %}')
+        self.assertEqual(
+            template.render(Context({"name": "a&b"})), "/profile/a&amp;b/")
+
+    def test_benchmark_command(self):
+        """Бенчмарк печатает строку на каждый адрес."""
+        out = StringIO()
+        call_command("benchmark_urls", repeat=1, stdout=out)
+        self.assertIn("posts:post_detail", out.getvalue())
+
+
+class WarmupTest(TestCase):
+    def test_template_names(self):
+        """Находятся шаблоны и проекта, и приложений."""
+        from django.template import engines
+
+        names = list(warmup.template_names(engines["django"].engine))
+        self.assertIn("posts/index.html", names)
+        self.assertIn("admin/base.html", names)
+        self.assertEqual(len(names), len(set(names)))
+
+    def test_warm_up_runs_all_stages(self):
+        """Прогрев проходит все этапы и пишет итог в лог."""
+        with self.assertLogs("core.warmup", "INFO"):
+            timings = warmup.warm_up()
+        self.assertEqual(list(timings), [name for name, _ in warmup.STAGES])
+        compiled, skipped = timings["templates"][0]
+        self.assertGreater(compiled, 0)
+        self.assertEqual(skipped, 0)
+
+    def test_databases_are_closed_after_warm_up(self):
+        """Соединения не переживают прогрев и не достаются форкам."""
+        from django.db import connections
+
+        with mock.patch.object(
+            connections, "close_all", wraps=connections.close_all
+        ) as close_all:
+            warmup.connect_databases()
+        close_all.assert_called_once_with()
+
+    def test_probe(self):
+        """В режиме --probe команда печатает замер первого запроса."""
+        out = StringIO()
+        with self.assertLogs("core.warmup", "INFO"):
+            call_command(
+                "warmup", probe="warm", urls=["/about/author/"], stdout=out)
+        result = json.loads(out.getvalue())
+        self.assertIn("/about/author/", result["first"])
+        self.assertGreater(result["warmup"], 0)
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError("SMTP недоступен")
+
+
+@override_settings(
+    EMAIL_BACKEND="core.mail.QueuedEmailBackend",
+    QUEUED_EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class QueuedEmailTest(TestCase):
+    def setUp(self):
+        User.objects.create_user(
+            username="reader", email="reader@test.ru", password="Pa55word")
+
+    def reset_password(self):
+        self.client.post(
+            reverse("users:password_reset"), {"email": "reader@test.ru"})
+
+    def test_password_reset_is_queued(self):
+        """Форма сброса пароля не отправляет письмо сама."""
+        self.reset_password()
+        self.assertEqual(outbox.outbox, [])
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.recipients, "reader@test.ru")
+        out = StringIO()
+        call_command("send_queued_mail", stdout=out)
+        self.assertIn("Отправлено: 1", out.getvalue())
+        self.assertEqual(len(outbox.outbox), 1)
+        self.assertEqual(outbox.outbox[0].to, ["reader@test.ru"])
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    def test_batches(self):
+        for _ in range(5):
+            self.reset_password()
+        self.assertEqual(mail.send_queued(batch_size=2), (2, 0))
+        call_command("send_queued_mail", batch_size=2, stdout=StringIO())
+        self.assertEqual(len(outbox.outbox), 5)
+
+    @override_settings(
+        QUEUED_EMAIL_BACKEND="core.tests.FailingBackend",
+        EMAIL_QUEUE_MAX_ATTEMPTS=2,
+    )
+    def test_retries(self):
+        """Неудачное письмо откладывается, а после последней попытки
+        помечается неудачным."""
+        self.reset_password()
+        self.assertEqual(mail.send_queued(), (0, 1))
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertIn("SMTP недоступен", email.last_error)
+        self.assertGreater(email.next_attempt, timezone.now())
+        # До следующей попытки письмо не трогаем.
+        self.assertEqual(mail.send_queued(), (0, 0))
+        QueuedEmail.objects.update(next_attempt=timezone.now())
+        self.assertEqual(mail.send_queued(), (0, 1))
+        self.assertEqual(QueuedEmail.objects.get().status, QueuedEmail.FAILED)
+        QueuedEmail.objects.update(next_attempt=timezone.now())
+        self.assertEqual(mail.send_queued(), (0, 0))
+
+
+calls = []
+
+
+@jobs.task("core.tests.record", max_attempts=2)
+def record(value, fail=False):
+    if fail:
+        raise ValueError(value)
+    calls.append(value)
+
+
+class JobQueueTest(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_waits_for_commit(self):
+        """Задача появляется только после коммита транзакции."""
+        with transaction.atomic():
+            jobs.enqueue("core.tests.record", 1)
+            self.assertFalse(Job.objects.exists())
+        self.assertEqual(Job.objects.get().name, "core.tests.record")
+        with self.assertRaises(ValueError), transaction.atomic():
+            jobs.enqueue("core.tests.record", 2)
+            raise ValueError
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_runworker(self):
+        for value in range(6):
+            jobs.enqueue("core.tests.record", value)
+        out = StringIO()
+        # Общая in-memory база тестов SQLite не ждёт блокировок, поэтому
+        # здесь один поток.
+        call_command("runworker", concurrency=1, burst=True, stdout=out)
+        self.assertEqual(sorted(calls), list(range(6)))
+        self.assertEqual(
+            Job.objects.filter(status=Job.DONE).count(), 6)
+        self.assertIn("Удалено старых выполненных задач: 0", out.getvalue())
+
+    def old_job(self, status, age):
+        return Job.objects.create(
+            name="core.tests.record", payload="{}", status=status,
+            finished=timezone.now() - timedelta(seconds=age),
+        )
+
+    def test_prune(self):
+        """Старые выполненные и неудачные задачи удаляются, неудачные
+        хранятся дольше."""
+        day = 60 * 60 * 24
+        self.old_job(Job.DONE, 2 * day)
+        self.old_job(Job.FAILED, 8 * day)
+        kept = self.old_job(Job.FAILED, 2 * day)
+        self.assertEqual(jobs.prune(), 2)
+        self.assertQuerysetEqual(
+            Job.objects.all(), [kept.pk], lambda job: job.pk)
+
+    @override_settings(JOB_PRUNE_INTERVAL=0)
+    def test_sigterm_stops_worker(self):
+        """runworker чистит старые задачи по ходу работы и по SIGTERM
+        выходит, как по Ctrl-C."""
+        self.old_job(Job.DONE, 2 * 60 * 60 * 24)
+        timer = threading.Timer(
+            1.5, os.kill, (os.getpid(), signal.SIGTERM))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        out = StringIO()
+        with mock.patch.object(jobs, "prune", wraps=jobs.prune) as prune:
+            call_command(
+                "runworker", concurrency=1, interval=0.1, stdout=out)
+        self.assertGreater(prune.call_count, 1)
+        self.assertIn("Удалено старых выполненных задач: 1", out.getvalue())
+        self.assertFalse(Job.objects.exists())
+
+    def test_retries(self):
+        jobs.enqueue("core.tests.record", "boom", fail=True)
+        with self.assertLogs("core.jobs", "WARNING"):
+            self.assertTrue(jobs.run_next())
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn("ValueError: boom", job.last_error)
+        self.assertFalse(jobs.run_next())
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs("core.jobs", "ERROR"):
+            jobs.run_next()
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+    def test_claim(self):
+        """Задачу получает один воркер; брошенная берётся снова."""
+        jobs.enqueue("core.tests.record", 1)
+        job = jobs.claim()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertIsNone(jobs.claim())
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(jobs.claim().pk, job.pk)
+
+    def test_staff_page(self):
+        jobs.enqueue("core.tests.record", 1)
+        jobs.enqueue("core.tests.record", 2)
+        jobs.run_next()
+        url = reverse("jobs")
+        self.assertEqual(self.client.get(url).status_code, HTTPStatus.FOUND)
+        staff = User.objects.create_user(username="staff", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(url)
+        self.assertContains(response, "core.tests.record")
+        row, = response.context["rows"]
+        self.assertEqual((row["queued"], row["done"]), (1, 1))
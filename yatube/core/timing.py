@@ -0,0 +1,127 @@
+import threading
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import (
+    DjangoTemplates, Template, reraise
+)
+
+from . import metrics, template_profiling
+
+
+_local = threading.local()
+_MISSING = object()
+
+
+class RequestTimings:
+    """Счётчики одного запроса: время SQL, шаблонов и обращения к кешу."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_time = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_stats = {}
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper()."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.sql_count += 1
+
+    def as_dict(self):
+        data = {
+            "total_ms": round(self.total_time * 1000, 2),
+            "view_ms": round(self.view_time * 1000, 2),
+            "sql_count": self.sql_count,
+            "sql_ms": round(self.sql_time * 1000, 2),
+            "template_ms": round(self.template_time * 1000, 2),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+        if self.template_stats:
+            data["templates"] = template_profiling.top(self.template_stats)
+        return data
+
+
+def start():
+    _local.timings = RequestTimings()
+    return _local.timings
+
+
+def stop():
+    return _local.__dict__.pop("timings", None)
+
+
+def current():
+    """Счётчики текущего запроса или None, если он не замеряется."""
+    return getattr(_local, "timings", None)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = current()
+        if timings is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Движок шаблонов Django, который учитывает время рендеринга
+    в счётчиках текущего запроса.
+
+    С OPTIONS["profile"] = True время и число вызовов считаются ещё и
+    для каждого шаблона, include, тега и фильтра."""
+
+    def __init__(self, params):
+        params = params.copy()
+        params["OPTIONS"] = options = params["OPTIONS"].copy()
+        if options.pop("profile", False):
+            template_profiling.install()
+        super().__init__(params)
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class InstrumentedCacheMixin:
+    """Считает попадания и промахи кеша: всего и в текущем запросе."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        hit = value is not _MISSING
+        metrics.CACHE_REQUESTS.inc(result="hit" if hit else "miss")
+        timings = current()
+        if timings is not None:
+            if hit:
+                timings.cache_hits += 1
+            else:
+                timings.cache_misses += 1
+        return value if hit else default
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
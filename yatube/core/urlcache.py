@@ -0,0 +1,85 @@
+"""Быстрый reverse() для горячих шаблонов.
+
+reverse() на каждый вызов заново проходит по пространствам имён,
+собирает регулярное выражение и проверяет им результат. Здесь это
+делается один раз: адреса без аргументов запоминаются целиком, а для
+пространств из PRECOMPILED_NAMESPACES заранее готовятся шаблоны
+подстановки и скомпилированные выражения. Всё остальное, как и любые
+несовпадения, уходит в обычный reverse(), поэтому ошибки те же.
+"""
+import re
+from urllib.parse import quote
+
+from django.core.signals import setting_changed
+from django.urls import get_resolver, get_script_prefix, get_urlconf, reverse
+from django.urls.resolvers import get_ns_resolver
+from django.utils.encoding import iri_to_uri
+from django.utils.http import RFC3986_SUBDELIMS, escape_leading_slashes
+
+
+PRECOMPILED_NAMESPACES = ("posts",)
+SAFE_CHARS = RFC3986_SUBDELIMS + "/~:@"
+
+_static = {}
+_compiled = {}
+
+
+def compile_view(viewname, urlconf, prefix):
+    """Варианты адреса для viewname вида "namespace:name":
+    (формат, параметры, выражение, конвертеры)."""
+    namespace, name = viewname.split(":")
+    resolver = get_resolver(urlconf)
+    extra, ns_resolver = resolver.namespace_dict[namespace]
+    ns_resolver = get_ns_resolver(
+        extra, ns_resolver, tuple(ns_resolver.pattern.converters.items()))
+    candidates = []
+    for possibility, pattern, defaults, converters in (
+            ns_resolver.reverse_dict.getlist(name)):
+        regex = re.compile("^%s%s" % (re.escape(prefix), pattern))
+        for result, params in possibility:
+            candidates.append((
+                prefix.replace("%", "%%") + result, params, regex, converters))
+    return candidates
+
+
+def fast_reverse(viewname, *args):
+    """reverse(viewname, args=args) с запоминанием."""
+    urlconf = get_urlconf()
+    prefix = get_script_prefix()
+    key = (viewname, urlconf, prefix)
+    if not args:
+        url = _static.get(key)
+        if url is None:
+            url = _static[key] = reverse(viewname, urlconf)
+        return url
+    if viewname.partition(":")[0] not in PRECOMPILED_NAMESPACES:
+        return reverse(viewname, urlconf, args=args)
+    candidates = _compiled.get(key)
+    if candidates is None:
+        candidates = _compiled[key] = compile_view(viewname, urlconf, prefix)
+    for template, params, regex, converters in candidates:
+        if len(params) != len(args):
+            continue
+        subs = {
+            param: (converters[param].to_url(value) if param in converters
+                    else str(value))
+            for param, value in zip(params, args)
+        }
+        candidate = template % subs
+        if regex.search(candidate):
+            return iri_to_uri(escape_leading_slashes(
+                quote(candidate, safe=SAFE_CHARS)))
+    return reverse(viewname, urlconf, args=args)
+
+
+def clear():
+    _static.clear()
+    _compiled.clear()
+
+
+def clear_on_urlconf_change(setting, **kwargs):
+    if setting == "ROOT_URLCONF":
+        clear()
+
+
+setting_changed.connect(clear_on_urlconf_change)
@@ -1,4 +1,26 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import (
+    Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from . import jobs as job_queue, metrics as app_metrics
+from .slowlog import slow_queries as slow_query_log
+from .staticfiles import is_hashed, negotiate
+
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
 
 
 def page_not_found(request, exception):
@@ -11,3 +33,158 @@ def csrf_failure(request, reason=""):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+def parse_range(header, size):
+    """Разбирает заголовок Range с одним диапазоном.
+
+    Возвращает пару (start, end) включительно, None для отсутствующего
+    или составного диапазона и ValueError для невыполнимого."""
+    match = RANGE_RE.match(header or "")
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def read_range(path, start, end):
+    with open(path, "rb") as media:
+        media.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = media.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    """Отдаёт файлы из MEDIA_ROOT с долгим кешированием.
+
+    Если настроен MEDIA_SENDFILE, сами байты отдаёт фронтовой сервер
+    через X-Sendfile или X-Accel-Redirect."""
+    fullpath = safe_join(settings.MEDIA_ROOT, path)
+    if not os.path.isfile(fullpath):
+        raise Http404
+    stat = os.stat(fullpath)
+    if not was_modified_since(
+        request.META.get("HTTP_IF_MODIFIED_SINCE"),
+        stat.st_mtime, stat.st_size
+    ):
+        response = HttpResponseNotModified()
+    elif settings.MEDIA_SENDFILE:
+        response = sendfile_response(fullpath, path)
+    else:
+        response = file_response(request, fullpath, stat.st_size)
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Cache-Control"] = (
+        f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable"
+    )
+    return response
+
+
+@require_safe
+def serve_static(request, path):
+    """Отдаёт собранную статику из STATIC_ROOT.
+
+    Если клиент принимает br или gzip и collectstatic положил сжатую
+    копию, отдаётся она. Хешированные имена кешируются навсегда,
+    остальные браузер перепроверяет."""
+    fullpath = safe_join(settings.STATIC_ROOT, path)
+    if not os.path.isfile(fullpath):
+        raise Http404
+    servepath, encoding = negotiate(
+        fullpath, request.META.get("HTTP_ACCEPT_ENCODING"))
+    stat = os.stat(servepath)
+    if not was_modified_since(
+        request.META.get("HTTP_IF_MODIFIED_SINCE"),
+        stat.st_mtime, stat.st_size
+    ):
+        response = HttpResponseNotModified()
+    else:
+        response = file_response(request, servepath, stat.st_size)
+        response["Content-Type"] = guess_type(fullpath)
+        if encoding:
+            response["Content-Encoding"] = encoding
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Vary"] = "Accept-Encoding"
+    if is_hashed(staticfiles_storage, path):
+        response["Cache-Control"] = (
+            f"public, max-age={settings.STATIC_CACHE_MAX_AGE}, immutable"
+        )
+    else:
+        response["Cache-Control"] = "public, max-age=0, must-revalidate"
+    return response
+
+
+def sendfile_response(fullpath, path):
+    response = HttpResponse(content_type=guess_type(fullpath))
+    if settings.MEDIA_SENDFILE == "x-accel-redirect":
+        response["X-Accel-Redirect"] = (
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + path
+        )
+    else:
+        response["X-Sendfile"] = fullpath
+    return response
+
+
+def file_response(request, fullpath, size):
+    try:
+        byte_range = parse_range(request.META.get("HTTP_RANGE"), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+    start, end = byte_range or (0, size - 1)
+    response = StreamingHttpResponse(
+        read_range(fullpath, start, end),
+        status=206 if byte_range else 200,
+        content_type=guess_type(fullpath),
+    )
+    if byte_range:
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = end - start + 1
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def guess_type(fullpath):
+    return mimetypes.guess_type(fullpath)[0] or "application/octet-stream"
+
+
+@staff_member_required
+def metrics(request):
+    """Метрики всех воркеров в формате Prometheus."""
+    return HttpResponse(
+        app_metrics.render(app_metrics.registry.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@staff_member_required
+def slow_queries(request):
+    """Медленные запросы этого воркера, сгруппированные по отпечатку."""
+    context = {
+        "entries": slow_query_log.report(),
+        "threshold": settings.SLOW_QUERY_THRESHOLD,
+    }
+    return render(request, "core/slow_queries.html", context)
+
+
+@staff_member_required
+def jobs(request):
+    """Глубина очереди фоновых задач и их задержки."""
+    context = {
+        "rows": job_queue.stats(),
+        "window": settings.JOB_STATS_WINDOW // 60,
+    }
+    return render(request, "core/jobs.html", context)
@@ -0,0 +1,118 @@
+"""Прогрев воркера до первого запроса.
+
+Без него первые запросы после деплоя платят за компиляцию шаблонов,
+заполнение URL-резолверов и импорт модулей, которые Django и sorl
+подгружают лениво.
+"""
+import importlib
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+from jinja2 import TemplateSyntaxError as JinjaSyntaxError
+
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(engine):
+    """Имена всех шаблонов движка в порядке поиска загрузчиков."""
+    seen = set()
+    for loader in engine.template_loaders:
+        # cached.Loader оборачивает обычные загрузчики.
+        for inner in getattr(loader, "loaders", [loader]):
+            for directory in inner.get_dirs():
+                for root, _, files in os.walk(directory):
+                    for filename in sorted(files):
+                        name = os.path.relpath(
+                            os.path.join(root, filename), directory)
+                        name = name.replace(os.sep, "/")
+                        if name not in seen:
+                            seen.add(name)
+                            yield name
+
+
+def compile_templates():
+    """Загружает все шаблоны; с cached.Loader они остаются в памяти.
+
+    Возвращает (скомпилировано, пропущено)."""
+    compiled = skipped = 0
+    for backend in engines.all():
+        engine = getattr(backend, "engine", None)
+        if engine is not None:
+            names, get_template = template_names(engine), engine.get_template
+        else:
+            # Jinja2: окружение само кеширует скомпилированные шаблоны.
+            names = backend.env.list_templates()
+            get_template = backend.env.get_template
+        for name in names:
+            try:
+                get_template(name)
+            except (TemplateSyntaxError, JinjaSyntaxError,
+                    UnicodeDecodeError):
+                # В каталогах шаблонов лежат и не-шаблоны.
+                skipped += 1
+            else:
+                compiled += 1
+    return compiled, skipped
+
+
+def populate_urls():
+    """Заполняет резолвер и резолверы пространств имён."""
+    resolver = get_resolver()
+    count = len(resolver.reverse_dict)
+    for _, ns_resolver in resolver.namespace_dict.values():
+        count += len(ns_resolver.reverse_dict)
+    return count
+
+
+def import_modules():
+    """Импортирует WARMUP_IMPORTS и движок, хранилище и бэкенд sorl."""
+    from sorl.thumbnail import default
+
+    for module in settings.WARMUP_IMPORTS:
+        importlib.import_module(module)
+    for lazy in (default.backend, default.engine, default.kvstore):
+        # LazyObject инициализируется при первом обращении к атрибуту.
+        getattr(lazy, "__class__")
+    return len(settings.WARMUP_IMPORTS) + 3
+
+
+def connect_databases():
+    """Проверяет подключение к базам и сразу закрывает его.
+
+    Прогрев идёт в мастере gunicorn с --preload: открытое здесь
+    соединение унаследовали бы все форкнутые воркеры, а общий сокет
+    или файл SQLite между процессами ломает протокол и блокировки.
+    Каждый воркер откроет своё соединение на первом запросе."""
+    for connection in connections.all():
+        connection.ensure_connection()
+    connections.close_all()
+    return len(connections.all())
+
+
+STAGES = (
+    ("templates", compile_templates),
+    ("urls", populate_urls),
+    ("imports", import_modules),
+    ("databases", connect_databases),
+)
+
+
+def warm_up():
+    """Выполняет все этапы прогрева; возвращает {этап: (результат, сек)}."""
+    timings = {}
+    for name, stage in STAGES:
+        started = time.perf_counter()
+        result = stage()
+        timings[name] = (result, time.perf_counter() - started)
+    logger.info(
+        "warm-up: %s",
+        ", ".join(f"{name} {seconds * 1000:.0f}ms"
+                  for name, (_, seconds) in timings.items()),
+    )
+    return timings
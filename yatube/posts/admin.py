@@ -1,15 +1,48 @@
+from functools import partial
+
 from django.contrib import admin
 
+from . import search
 from .models import Post, Group
+from .utils import EstimatedCountPaginator, group_choices
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ("pk", "text", "pub_date", "author", "group", )
     list_editable = ("group",)
-    search_fields = ("text",)
     list_filter = ("pub_date",)
+    list_select_related = ("author", "group")
+    search_fields = ("text",)
+    date_hierarchy = "pub_date"
+    autocomplete_fields = ("author", "group")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = "-пусто-"
 
+    def get_search_results(self, request, queryset, search_term):
+        # Ищем по полнотекстовому индексу, а не через icontains.
+        if not search_term:
+            return queryset, False
+        return search.search(queryset, search_term), False
+
+    def get_changelist_formset(self, request, **kwargs):
+        kwargs["formfield_callback"] = partial(
+            self.changelist_formfield, request=request)
+        return super().get_changelist_formset(request, **kwargs)
+
+    def changelist_formfield(self, db_field, request, **kwargs):
+        # В списке постов группа — обычный select, но его варианты
+        # берутся из кеша, а не запросом на каждую строку.
+        if db_field.name == "group":
+            formfield = db_field.formfield(**kwargs)
+            formfield.choices = group_choices()
+            return formfield
+        return self.formfield_for_dbfield(db_field, request, **kwargs)
+
+
+class GroupAdmin(admin.ModelAdmin):
+    search_fields = ("title", "slug")
+
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
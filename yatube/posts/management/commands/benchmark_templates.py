@@ -0,0 +1,101 @@
+import timeit
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from posts.forms import CommentForm
+from posts.models import Comment, Group, Post
+from posts.utils import paginate
+
+
+User = get_user_model()
+
+ENGINES = ("django", "jinja2")
+POSTS = 30
+COMMENTS = 50
+REPEAT = 5
+NUMBER = 20
+
+
+class Rollback(Exception):
+    """Откатывает транзакцию с тестовыми данными."""
+
+
+def contexts(request):
+    """Контексты страниц posts; запросы к базе выполняются здесь,
+    чтобы замер касался только рендеринга."""
+    author = User.objects.create_user(username="benchmark_author")
+    group = Group.objects.create(title="Бенчмарк", slug="benchmark")
+    Post.objects.bulk_create(
+        Post(author=author, group=group, text=f"Пост {i}\n\nвторой абзац")
+        for i in range(POSTS)
+    )
+    post = Post.objects.filter(author=author).first()
+    Comment.objects.bulk_create(
+        Comment(post=post, author=author, text=f"Комментарий {i}")
+        for i in range(COMMENTS)
+    )
+    page_obj = paginate(request, Post.objects.for_feed())
+    page_obj.object_list = list(page_obj.object_list)
+    return {
+        "posts/index.html": {"page_obj": page_obj},
+        "posts/group_list.html": {"group": group, "page_obj": page_obj},
+        "posts/follow.html": {"page_obj": page_obj},
+        "posts/profile.html": {
+            "author": author, "page_obj": page_obj,
+            "post_count": POSTS, "following": False,
+        },
+        "posts/post_detail.html": {
+            "post": post, "post_count": POSTS, "form": CommentForm(),
+            "comments": list(post.comments.select_related("author")),
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает скорость рендеринга шаблонов posts движками Django "
+        "и Jinja2 на одинаковых контекстах."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--number", type=int, default=NUMBER,
+            help="Рендеров в одном замере.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=REPEAT,
+            help="Сколько раз повторить замер; берётся лучший.",
+        )
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        try:
+            with transaction.atomic():
+                self.benchmark(
+                    request, contexts(request),
+                    options["number"], options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def benchmark(self, request, pages, number, repeat):
+        self.stdout.write("Миллисекунды на один рендер, лучшее из замеров.")
+        self.stdout.write(f"{'template':<26}{'django':>10}{'jinja2':>10}")
+        for name, context in pages.items():
+            timings = []
+            for using in ENGINES:
+                def run():
+                    render_to_string(name, context, request, using=using)
+                run()  # компиляция шаблона не в счёт
+                best = min(timeit.repeat(run, number=number, repeat=repeat))
+                timings.append(best / number * 1000)
+            self.stdout.write(
+                f"{name:<26}"
+                + "".join(f"{timing:>10.2f}" for timing in timings)
+            )
@@ -0,0 +1,199 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default as thumbnail_default
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    KVStore as CachedDBKVStore,
+)
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from posts.models import Post
+
+
+CHUNK_SIZE = 1000
+MIN_AGE = 60 * 60
+
+
+def walk(root, directory):
+    """Отдаёт пути файлов относительно root в порядке сравнения строк,
+    не загружая весь каталог в память.
+
+    Каталог сортируется по имени с "/" на конце, как в полном пути:
+    иначе ab/x.jpg шёл бы раньше ab.jpg ("/" > "."), и продолжение
+    обхода по name > last пропускало бы или повторяло файлы."""
+    path = os.path.join(root, directory)
+    if not os.path.isdir(path):
+        return
+    with os.scandir(path) as entries:
+        entries = sorted(
+            entries,
+            key=lambda entry: entry.name + (
+                "/" if entry.is_dir(follow_symlinks=False) else ""),
+        )
+    for entry in entries:
+        name = f"{directory}/{entry.name}"
+        if entry.is_dir(follow_symlinks=False):
+            yield from walk(root, name)
+        elif entry.is_file(follow_symlinks=False):
+            yield name
+
+
+def chunked(names, size):
+    chunk = []
+    for name in names:
+        chunk.append(name)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет картинки постов и миниатюры sorl, на которые "
+        "больше никто не ссылается."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Только показать, что будет удалено.",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=CHUNK_SIZE,
+            help="Сколько файлов проверять за один запрос к базе.",
+        )
+        parser.add_argument(
+            "--min-age", type=int, default=MIN_AGE,
+            help="Не трогать файлы моложе указанного числа секунд.",
+        )
+        parser.add_argument(
+            "--state-file",
+            default=os.path.join(settings.BASE_DIR, ".cleanup_media.json"),
+            help="Файл с точкой продолжения прерванного запуска.",
+        )
+        parser.add_argument(
+            "--restart", action="store_true",
+            help="Начать обход заново, игнорируя сохранённую позицию.",
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options["dry_run"]
+        self.chunk_size = options["chunk_size"]
+        self.deadline = time.time() - options["min_age"]
+        self.state_file = options["state_file"]
+        self.state = {} if options["restart"] else self.load_state()
+        self.image_field = Post._meta.get_field("image")
+        self.started = time.monotonic()
+        self.scanned = self.removed = self.freed = 0
+
+        phases = (
+            ("originals", self.image_field.upload_to.rstrip("/"),
+             self.image_field.storage, self.orphan_originals),
+            ("thumbnails", thumbnail_settings.THUMBNAIL_PREFIX.rstrip("/"),
+             thumbnail_default.storage, self.orphan_thumbnails),
+        )
+        for phase, directory, storage, find_orphans in phases:
+            if phase in self.state.get("done", []):
+                continue
+            self.sweep(phase, directory, storage, find_orphans)
+            self.state.setdefault("done", []).append(phase)
+            self.state.pop(phase, None)
+            self.save_state()
+
+        self.clear_state()
+        verb = "будет удалено" if self.dry_run else "удалено"
+        self.stdout.write(self.style.SUCCESS(
+            f"Проверено файлов: {self.scanned}, {verb}: {self.removed} "
+            f"({self.freed / 1024 / 1024:.1f} МБ) "
+            f"за {time.monotonic() - self.started:.1f} с"
+        ))
+
+    def sweep(self, phase, directory, storage, find_orphans):
+        last = self.state.get(phase)
+        names = walk(storage.location, directory)
+        if last:
+            names = (name for name in names if name > last)
+        for chunk in chunked(names, self.chunk_size):
+            self.scanned += len(chunk)
+            candidates = [name for name in chunk if self.is_old(storage, name)]
+            for name in find_orphans(candidates):
+                self.remove(phase, storage, name)
+            self.state[phase] = chunk[-1]
+            self.save_state()
+            self.report(phase)
+
+    def is_old(self, storage, name):
+        return os.path.getmtime(storage.path(name)) < self.deadline
+
+    def orphan_originals(self, names):
+        referenced = set(
+            Post.objects.filter(image__in=names)
+            .values_list("image", flat=True)
+        )
+        return [name for name in names if name not in referenced]
+
+    def orphan_thumbnails(self, names):
+        # Миниатюра жива, пока её ключ есть в хранилище sorl: при удалении
+        # исходника sorl удаляет и ключи всех его миниатюр.
+        kvstore = thumbnail_default.kvstore
+        storage = thumbnail_default.storage
+        if not isinstance(kvstore, CachedDBKVStore):
+            return [
+                name for name in names
+                if kvstore.get(ImageFile(name, storage)) is None
+            ]
+        # Ключи в базе — всегда полная копия кеша sorl: одна выборка
+        # на пачку вместо запроса на файл.
+        keys = {
+            add_prefix(ImageFile(name, storage).key): name for name in names
+        }
+        stored = set(
+            KVStoreModel.objects.filter(key__in=keys)
+            .values_list("key", flat=True)
+        )
+        return [name for key, name in keys.items() if key not in stored]
+
+    def remove(self, phase, storage, name):
+        self.removed += 1
+        self.freed += os.path.getsize(storage.path(name))
+        if self.dry_run:
+            self.stdout.write(f"  {name}")
+            return
+        if phase == "originals":
+            delete_thumbnails(
+                self.image_field.attr_class(None, self.image_field, name)
+            )
+        else:
+            storage.delete(name)
+
+    def report(self, phase):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        self.stdout.write(
+            f"[{phase}] проверено {self.scanned}, "
+            f"найдено {self.removed}, {self.scanned / elapsed:.0f} файлов/с"
+        )
+
+    def load_state(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        with open(self.state_file) as state_file:
+            return json.load(state_file)
+
+    def save_state(self):
+        if self.dry_run:
+            return
+        with open(self.state_file, "w") as state_file:
+            json.dump(self.state, state_file)
+
+    def clear_state(self):
+        if not self.dry_run and os.path.exists(self.state_file):
+            os.remove(self.state_file)
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает посты и комментарии пользователя в JSON Lines или CSV "
+        "потоком, не загружая их в память."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument(
+            "--format", choices=sorted(export.FORMATS), default="jsonl")
+        parser.add_argument(
+            "--output", help="Файл для выгрузки; по умолчанию stdout.")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options["username"]).first()
+        if user is None:
+            raise CommandError(
+                f"Пользователь {options['username']} не найден.")
+        chunks = export.export(user, options["format"])
+        if not options["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+        # newline="" — csv сам пишет переводы строк \r\n.
+        with open(options["output"], "w", encoding="utf-8",
+                  newline="") as output:
+            for chunk in chunks:
+                output.write(chunk)
@@ -0,0 +1,133 @@
+import linecache
+import tracemalloc
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+
+User = get_user_model()
+
+SIZES = "10,100,1000"
+TOP = 10
+
+
+def seed(size):
+    """Автор с size постами в группе, подписчик на него и size
+    комментариев у первого поста.
+
+    Имена уникальны: замер не споткнётся о данные прерванного прогона
+    или настоящего пользователя."""
+    suffix = uuid.uuid4().hex[:8]
+    author = User.objects.create_user(username=f"memory_author_{suffix}")
+    follower = User.objects.create_user(
+        username=f"memory_follower_{suffix}")
+    Follow.objects.create(user=follower, author=author)
+    group = Group.objects.create(
+        title=f"Замер памяти {suffix}", slug=f"memory-{suffix}",
+        description="Группа для profile_memory",
+    )
+    Post.objects.bulk_create(
+        Post(author=author, group=group, text=f"Пост {i} " * 20)
+        for i in range(size)
+    )
+    post = Post.objects.filter(author=author).order_by("id").first()
+    Comment.objects.bulk_create(
+        Comment(post=post, author=author, text=f"Комментарий {i} " * 10)
+        for i in range(size)
+    )
+    return author, follower, group, post
+
+
+def measure(client, url):
+    """Пиковый объём памяти на запрос и аллокации, живые после ответа."""
+    # reset_peak() появился только в 3.9, поэтому перезапускаем трассировку.
+    tracemalloc.stop()
+    tracemalloc.start(10)
+    response = client.get(url)
+    size = 0
+    if response.streaming:
+        for chunk in response.streaming_content:
+            size += len(chunk)
+    else:
+        size = len(response.content)
+    peak = tracemalloc.get_traced_memory()[1]
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, linecache.__file__),
+    ))
+    tracemalloc.stop()
+    return response.status_code, size, peak, snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Рендерит ленты на растущих объёмах данных и показывает пиковую "
+        "память и главные места аллокаций."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default=SIZES,
+            help="Число постов и комментариев через запятую.",
+        )
+        parser.add_argument(
+            "--top", type=int, default=TOP,
+            help="Сколько мест аллокаций показывать.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",")]
+        except ValueError:
+            raise CommandError("--sizes: ожидаются целые числа.")
+        # Кеш страниц и отладочный журнал запросов исказили бы замер.
+        with override_settings(
+            DEBUG=False,
+            ALLOWED_HOSTS=["*"],
+            CACHES={"default": {
+                "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+            }},
+        ):
+            for size in sizes:
+                self.profile(size, options["top"])
+
+    def profile(self, size, top):
+        with transaction.atomic():
+            try:
+                author, follower, group, post = seed(size)
+                pages = {
+                    "index": reverse("posts:index"),
+                    "group_list": reverse(
+                        "posts:group_list", args=[group.slug]),
+                    "follow_index": reverse("posts:follow_index"),
+                    "profile": reverse(
+                        "posts:profile", args=[author.username]),
+                    "post_detail": reverse(
+                        "posts:post_detail", args=[post.id]),
+                }
+                client = Client()
+                client.force_login(follower)
+                for name, url in pages.items():
+                    client.get(url)  # прогрев импорта и шаблонов
+                    status, length, peak, snapshot = measure(client, url)
+                    self.stdout.write(
+                        f"{name} size={size} status={status} "
+                        f"bytes={length} peak={peak / 1024:.1f}KiB"
+                    )
+                    for stat in snapshot.statistics("lineno")[:top]:
+                        frame = stat.traceback[0]
+                        self.stdout.write(
+                            f"    {stat.size / 1024:8.1f}KiB "
+                            f"{stat.count:6d} {frame.filename}:{frame.lineno}"
+                        )
+            finally:
+                # Данные замера не остаются в базе, даже если прогон
+                # прервали.
+                transaction.set_rollback(True)
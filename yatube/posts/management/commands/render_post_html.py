@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts import markup
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Заново рендерит сохранённый HTML постов (text_html и excerpt_html), "
+        "например после изменения разметки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--missing", action="store_true",
+            help="Только посты, у которых HTML ещё не заполнен.",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=markup.BACKFILL_CHUNK_SIZE,
+            help="Сколько постов обновлять за один запрос.",
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.all()
+        if options["missing"]:
+            posts = posts.filter(text_html="")
+        updated = markup.backfill(posts, options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Обновлено постов: {updated}."))
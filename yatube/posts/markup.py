@@ -0,0 +1,43 @@
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+
+EXCERPT_LENGTH = 300
+BACKFILL_CHUNK_SIZE = 500
+
+
+def render_html(text):
+    """Текст поста в HTML: экранирование и абзацы, как у фильтра
+    linebreaks, но один раз при сохранении, а не на каждом рендере."""
+    return linebreaks(text, autoescape=True)
+
+
+def render_excerpt(text):
+    """Начало поста для лент, в том же HTML-виде."""
+    return render_html(Truncator(text).chars(EXCERPT_LENGTH))
+
+
+def fill(post):
+    """Заполняет у поста HTML-поля по его тексту."""
+    post.text_html = render_html(post.text)
+    post.excerpt_html = render_excerpt(post.text)
+
+
+def backfill(queryset, chunk_size=BACKFILL_CHUNK_SIZE):
+    """Пересчитывает HTML-поля пачками по первичному ключу, не загружая
+    всю таблицу разом. Возвращает число обновлённых постов.
+
+    Работает и с историческими моделями из миграций."""
+    queryset = queryset.order_by("pk").only("pk", "text")
+    updated = 0
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return updated
+        for post in chunk:
+            fill(post)
+        queryset.model.objects.bulk_update(
+            chunk, ["text_html", "excerpt_html"])
+        updated += len(chunk)
+        last_pk = chunk[-1].pk
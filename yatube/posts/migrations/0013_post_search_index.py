@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from posts import search
+
+
+def install_search_index(apps, schema_editor):
+    search.install(schema_editor.connection, rebuild=True)
+
+
+def uninstall_search_index(apps, schema_editor):
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_image_hashed_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
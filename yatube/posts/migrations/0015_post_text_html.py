@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:08
+
+from django.db import migrations, models
+
+from posts import markup
+
+
+def render_post_html(apps, schema_editor):
+    markup.backfill(apps.get_model("posts", "Post").objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_pub_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_html',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(render_post_html, migrations.RunPython.noop),
+    ]
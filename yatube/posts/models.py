@@ -1,6 +1,9 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from . import markup
+from .storage import HashedMediaStorage
+
 
 User = get_user_model()
 
@@ -28,10 +31,27 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create не вызывает save(), поэтому HTML считаем здесь.
+        objs = list(objs)
+        for post in objs:
+            markup.fill(post)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def for_feed(self):
+        """Посты для лент: с автором и группой, но без полного текста —
+        лента показывает только excerpt_html."""
+        return self.select_related("author", "group").defer(
+            "text", "text_html")
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name="Текст",
     )
+    text_html = models.TextField(editable=False, default="")
+    excerpt_html = models.TextField(editable=False, default="")
     pub_date = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(
         User,
@@ -50,17 +70,33 @@ class Post(models.Model):
     image = models.ImageField(
         "Картинка",
         upload_to="posts/",
-        blank=True
+        storage=HashedMediaStorage(),
+        blank=True,
+        db_index=True,
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(fields=["pub_date"], name="post_pub_date_idx"),
+        ]
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
 
     def __str__(self):
         return self.text[:START_POST]
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "text" in update_fields:
+            markup.fill(self)
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields, "text_html", "excerpt_html"}
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -0,0 +1,112 @@
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+
+FTS_TABLE = "posts_post_fts"
+SNIPPET_TOKENS = 16
+# Маркеры подсветки, которых не бывает в тексте поста: snippet() вставляет
+# их как есть, а в HTML они превращаются в <mark> уже после экранирования.
+MARK_START = "\x02"
+MARK_END = "\x03"
+WORD_RE = re.compile(r"\w+")
+
+CREATE_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "text, content='posts_post', content_rowid='id', tokenize='unicode61')"
+)
+CREATE_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+)
+
+
+def is_supported(using=connection):
+    return using.vendor == "sqlite"
+
+
+def install(using=connection, rebuild=False):
+    """Создаёт индекс FTS5 и триггеры, которые держат его в актуальном
+    состоянии при любой записи в posts_post.
+
+    Django пересоздаёт таблицу posts_post на SQLite при изменении схемы,
+    и триггеры теряются, поэтому функция вызывается и после каждого
+    migrate: все выражения идемпотентны."""
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        for statement in CREATE_TRIGGERS:
+            cursor.execute(statement)
+        if rebuild:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall(using=connection):
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        for suffix in ("ai", "ad", "au"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def to_match(query):
+    """Превращает пользовательский ввод в безопасное выражение MATCH:
+    все слова обязательны, последнее ищется по префиксу."""
+    words = WORD_RE.findall(query)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search(queryset, query):
+    """Оставляет в queryset постов только найденные по запросу,
+    добавляя поля rank и snippet и сортируя по релевантности."""
+    if not WORD_RE.search(query):
+        return queryset.none()
+    if not is_supported():
+        for word in WORD_RE.findall(query):
+            queryset = queryset.filter(text__icontains=word)
+        return queryset.extra(select={"rank": "0", "snippet": "''"})
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f"{FTS_TABLE}.rowid = posts_post.id",
+            f"{FTS_TABLE} MATCH %s",
+        ],
+        params=[to_match(query)],
+        select={
+            "rank": f"bm25({FTS_TABLE})",
+            "snippet": f"snippet({FTS_TABLE}, 0, %s, %s, '…', %s)",
+        },
+        select_params=[MARK_START, MARK_END, SNIPPET_TOKENS],
+    ).order_by("rank")
+
+
+def highlight(post):
+    """HTML-фрагмент с подсвеченными совпадениями."""
+    snippet = post.snippet or post.text[:200]
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, "<mark>")
+        .replace(MARK_END, "</mark>")
+    )
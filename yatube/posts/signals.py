@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections, transaction
+from django.db.models.signals import (
+    post_delete, post_migrate, post_save, pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_thumbnails
+
+from . import search
+from .models import Group, Post
+from .utils import GROUP_CHOICES_CACHE_KEY
+
+
+# Файлы, записанные или переиспользованные недавно, не удаляем:
+# их может подхватить пост из ещё не завершённой транзакции.
+RELEASE_GRACE = 60
+
+
+def image_references(name):
+    """Количество постов, которые ссылаются на файл картинки."""
+    return Post.objects.filter(image=name).count()
+
+
+def release_image(name):
+    """Удаляет картинку и её миниатюры, если на неё больше никто
+    не ссылается. Возвращает True, если файл был удалён."""
+    if not name or image_references(name):
+        return False
+    image = Post._meta.get_field("image")
+    storage = image.storage
+    try:
+        if not storage.exists(name):
+            return False
+    except SuspiciousFileOperation:
+        # Имя указывает за пределы MEDIA_ROOT: такой файл не наш.
+        return False
+    age = timezone.now() - storage.get_modified_time(name)
+    if age.total_seconds() < RELEASE_GRACE:
+        return False
+    delete_thumbnails(image.attr_class(None, image, name))
+    return True
+
+
+@receiver(pre_save, sender=Post)
+def remember_replaced_image(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    old_name = (
+        Post.objects.filter(pk=instance.pk)
+        .values_list("image", flat=True)
+        .first()
+    )
+    if old_name and old_name != instance.image.name:
+        instance._replaced_image = old_name
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, **kwargs):
+    old_name = instance.__dict__.pop("_replaced_image", None)
+    if old_name:
+        transaction.on_commit(lambda: release_image(old_name))
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    name = instance.image.name
+    if name:
+        transaction.on_commit(lambda: release_image(name))
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    # Пересборка таблицы posts_post в миграциях SQLite удаляет триггеры
+    # поискового индекса: возвращаем их, если индекс уже создан.
+    connection = connections[using]
+    if sender.name != "posts" or not search.is_supported(connection):
+        return
+    if search.FTS_TABLE in connection.introspection.table_names():
+        search.install(connection)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def reset_group_choices(sender, **kwargs):
+    cache.delete(GROUP_CHOICES_CACHE_KEY)
@@ -0,0 +1,42 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class HashedMediaStorage(FileSystemStorage):
+    """Хранилище, которое называет файлы по хешу их содержимого.
+
+    Одинаковые картинки сохраняются на диск один раз: все посты
+    ссылаются на общий файл, а значит и на общий набор миниатюр sorl.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            # Обновляем время изменения, чтобы параллельное удаление
+            # последней ссылки не забрало файл у нового поста.
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+    def hashed_name(self, name, content):
+        """Возвращает имя вида ``posts/ab/abcdef....jpg``."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        dirname, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        hexdigest = digest.hexdigest()
+        return "/".join(
+            part for part in (dirname, hexdigest[:2], hexdigest + extension)
+            if part
+        )
@@ -0,0 +1,42 @@
+from django.core.mail import send_mail
+from sorl.thumbnail import get_thumbnail
+
+from core.jobs import task
+
+from .models import Comment, Post
+
+
+# Миниатюры, которые показывают шаблоны лент и страницы поста.
+THUMBNAILS = (
+    ("960x339", {"crop": "center", "upscale": True}),
+)
+
+
+@task("posts.make_thumbnails")
+def make_thumbnails(post_id):
+    """Готовит миниатюры заранее, чтобы их не делал первый зритель."""
+    post = Post.objects.only("image").filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    for geometry, options in THUMBNAILS:
+        get_thumbnail(post.image, geometry, **options)
+
+
+@task("posts.notify_comment")
+def notify_comment(comment_id):
+    """Пишет автору поста о новом комментарии."""
+    comment = Comment.objects.select_related(
+        "author", "post__author").filter(pk=comment_id).first()
+    if comment is None:
+        return
+    recipient = comment.post.author
+    if not recipient.email or recipient == comment.author:
+        return
+    # Перевод строки в заголовке письма — BadHeaderError.
+    title = " ".join(str(comment.post).split())
+    send_mail(
+        f"Новый комментарий к посту «{title}»",
+        f"{comment.author.username} пишет:\n\n{comment.text}",
+        None,
+        [recipient.email],
+    )
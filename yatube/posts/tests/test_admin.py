@@ -0,0 +1,100 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.utils import (
+    GROUP_CHOICES_CACHE_TIME, GROUP_CHOICES_LOCAL_CACHE_TIME,
+    EstimatedCountPaginator, group_choices,
+)
+
+
+User = get_user_model()
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            "admin", "admin@example.com", "password")
+        cls.groups = [
+            Group.objects.create(
+                title=f"Группа {number}",
+                slug=f"group-{number}",
+                description="Тестовое описание",
+            )
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        cache.clear()
+
+    def create_posts(self, count):
+        Post.objects.bulk_create(
+            Post(
+                author=self.admin,
+                text=f"Пост {number}",
+                group=self.groups[number % len(self.groups)],
+            )
+            for number in range(count)
+        )
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("admin:posts_post_changelist"))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка постов не зависит от числа строк."""
+        self.create_posts(2)
+        self.changelist_queries()
+        few = self.changelist_queries()
+        self.create_posts(20)
+        self.assertEqual(self.changelist_queries(), few)
+
+    def test_group_choices_are_cached(self):
+        self.assertEqual(len(group_choices()), len(self.groups) + 1)
+        with self.assertNumQueries(0):
+            group_choices()
+        Group.objects.create(title="Новая", slug="new", description="-")
+        self.assertEqual(len(group_choices()), len(self.groups) + 2)
+
+    def test_group_choices_expire_without_shared_cache(self):
+        """Группа, созданная другим процессом (без сигнала в этом),
+        появляется в вариантах, как только истечёт короткий срок."""
+        group_choices()
+        Group.objects.bulk_create([
+            Group(title="Чужая", slug="other", description="-")])
+        self.assertEqual(len(group_choices()), len(self.groups) + 1)
+        later = time.time() + GROUP_CHOICES_LOCAL_CACHE_TIME + 1
+        with mock.patch("time.time", return_value=later):
+            self.assertEqual(len(group_choices()), len(self.groups) + 2)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_group_choices_live_long_in_shared_cache(self):
+        with mock.patch.object(cache, "set") as cache_set:
+            group_choices()
+        self.assertEqual(
+            cache_set.call_args[0][2], GROUP_CHOICES_CACHE_TIME)
+
+    def test_paginator_uses_estimate_for_large_tables(self):
+        self.create_posts(3)
+        with mock.patch(
+            "posts.utils.estimate_count", return_value=2000000
+        ):
+            paginator = EstimatedCountPaginator(Post.objects.all(), 100)
+            self.assertEqual(paginator.count, 2000000)
+            filtered = EstimatedCountPaginator(
+                Post.objects.filter(group=self.groups[0]), 100)
+            self.assertEqual(filtered.count, 1)
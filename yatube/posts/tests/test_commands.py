@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default as thumbnail_default
+from sorl.thumbnail.images import ImageFile, serialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from posts.management.commands.cleanup_media import Command, walk
+from posts.models import Post
+
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class CleanupMediaCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="author")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        storage = Post._meta.get_field("image").storage
+        self.post = Post.objects.create(
+            author=self.user,
+            text="Тестовый пост",
+            image=ContentFile(b"used", name="used.gif"),
+        )
+        self.used = self.post.image.path
+        self.orphan = storage.path(storage.save(
+            "posts/orphan.gif", ContentFile(b"orphan")))
+        past = time.time() - 2 * 60 * 60
+        for path in (self.used, self.orphan):
+            os.utime(path, (past, past))
+        self.state_file = os.path.join(TEMP_MEDIA_ROOT, "state.json")
+
+    def cleanup(self, *args):
+        call_command(
+            "cleanup_media", *args, state_file=self.state_file,
+            stdout=StringIO(),
+        )
+
+    def test_dry_run_keeps_files(self):
+        """В режиме --dry-run файлы не удаляются."""
+        self.cleanup("--dry-run")
+        self.assertTrue(os.path.exists(self.orphan))
+
+    def test_removes_only_orphans(self):
+        """Удаляются только картинки, на которые нет ссылок."""
+        self.cleanup("--chunk-size", "1")
+        self.assertFalse(os.path.exists(self.orphan))
+        self.assertTrue(os.path.exists(self.used))
+        self.assertFalse(os.path.exists(self.state_file))
+
+    def make_old_files(self, *names):
+        past = time.time() - 2 * 60 * 60
+        paths = []
+        for name in names:
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as media:
+                media.write(b"orphan")
+            os.utime(path, (past, past))
+            self.addCleanup(
+                lambda path=path: os.path.exists(path) and os.remove(path))
+            paths.append(path)
+        return paths
+
+    def test_walk_follows_string_order(self):
+        """Файл и каталог с общим префиксом идут в порядке строк путей."""
+        self.make_old_files("posts/ab.gif", "posts/ab/x.gif")
+        names = list(walk(TEMP_MEDIA_ROOT, "posts"))
+        self.assertEqual(names, sorted(names))
+        self.assertLess(
+            names.index("posts/ab.gif"), names.index("posts/ab/x.gif"))
+
+    def test_resume_after_sibling_file(self):
+        """Продолжение с сохранённой позиции не теряет вложенные файлы."""
+        processed, pending = self.make_old_files(
+            "posts/ab.gif", "posts/ab/x.gif")
+        with open(self.state_file, "w") as state_file:
+            json.dump({"originals": "posts/ab.gif"}, state_file)
+        self.cleanup()
+        self.assertTrue(os.path.exists(processed))
+        self.assertFalse(os.path.exists(pending))
+
+    def test_one_query_per_chunk(self):
+        """Ссылки на пачку файлов проверяются одним запросом в каждой
+        фазе, а не по запросу на файл."""
+        command = Command()
+        originals = [f"posts/{number}.gif" for number in range(20)]
+        with self.assertNumQueries(1):
+            self.assertEqual(command.orphan_originals(originals), originals)
+        storage = thumbnail_default.storage
+        thumbnails = [f"cache/{number}.jpg" for number in range(20)]
+        kept = ImageFile(thumbnails[0], storage)
+        kept.set_size((1, 1))
+        KVStoreModel.objects.create(
+            key=add_prefix(kept.key), value=serialize_image_file(kept))
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                command.orphan_thumbnails(thumbnails), thumbnails[1:])
+
+    def test_skips_recent_files(self):
+        """Свежие файлы не трогаем."""
+        os.utime(self.orphan)
+        self.cleanup()
+        self.assertTrue(os.path.exists(self.orphan))
+
+
+class ProfileMemoryCommandTest(TestCase):
+    def test_reports_peak_per_view(self):
+        """Команда печатает пик памяти для каждой страницы и размера."""
+        out = StringIO()
+        call_command("profile_memory", sizes="2,5", top=1, stdout=out)
+        output = out.getvalue()
+        for name in ("index", "group_list", "follow_index", "profile",
+                     "post_detail"):
+            for size in (2, 5):
+                self.assertIn(f"{name} size={size} status=200", output)
+        self.assertIn("peak=", output)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(User.objects.exists())
+
+    def test_existing_users_do_not_clash(self):
+        """Повторный прогон не падает на уже занятых именах."""
+        User.objects.create_user(username="memory_profile_author")
+        call_command("profile_memory", sizes="1", top=0, stdout=StringIO())
+        call_command("profile_memory", sizes="1", top=0, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 1)
+
+
+class RenderPostHtmlCommandTest(TestCase):
+    def test_backfills_html(self):
+        """Команда заполняет HTML у постов, записанных в обход save()."""
+        user = User.objects.create_user(username="author")
+        post = Post.objects.create(author=user, text="Текст")
+        Post.objects.filter(pk=post.pk).update(text_html="", excerpt_html="")
+        call_command(
+            "render_post_html", "--missing", "--chunk-size", "1",
+            stdout=StringIO(),
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, "<p>Текст</p>")
+        self.assertEqual(post.excerpt_html, "<p>Текст</p>")
@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import export
+from posts.models import Comment, Group, Post
+
+
+User = get_user_model()
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="author")
+        other = User.objects.create_user(username="other")
+        group = Group.objects.create(
+            title="Группа", slug="test-slug", description="Описание")
+        cls.post = Post.objects.create(
+            author=cls.user, text="Пост, с \"кавычками\"\nи строкой",
+            group=group, image="posts/picture.gif",
+        )
+        Post.objects.create(author=cls.user, text="Второй пост")
+        other_post = Post.objects.create(author=other, text="Чужой пост")
+        cls.comment = Comment.objects.create(
+            post=other_post, author=cls.user, text="Комментарий")
+        Comment.objects.create(post=cls.post, author=other, text="Чужой")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get(self, export_format):
+        response = self.client.get(
+            reverse("posts:export"), {"format": export_format})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_jsonl(self):
+        records = [json.loads(line) for line in self.get("jsonl").splitlines()]
+        self.assertEqual(
+            [(record["type"], record["text"]) for record in records], [
+                ("post", self.post.text),
+                ("post", "Второй пост"),
+                ("comment", "Комментарий"),
+            ])
+        post = records[0]
+        self.assertEqual(post["group"], "test-slug")
+        self.assertEqual(
+            post["group_url"], "http://testserver/group/test-slug/")
+        self.assertEqual(
+            post["image_url"], "http://testserver/media/posts/picture.gif")
+        self.assertIsNone(records[1]["image_url"])
+        self.assertEqual(records[2]["post_id"], self.comment.post_id)
+
+    def test_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.get("csv"))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["text"], self.post.text)
+        self.assertEqual(rows[2]["type"], "comment")
+        self.assertEqual(rows[2]["group"], "")
+
+    def test_csv_formulas_are_escaped(self):
+        Post.objects.create(author=self.user, text="=HYPERLINK(\"x\")")
+        Post.objects.create(author=self.user, text="-1+2")
+        texts = [row["text"]
+                 for row in csv.DictReader(io.StringIO(self.get("csv")))]
+        self.assertIn("'=HYPERLINK(\"x\")", texts)
+        self.assertIn("'-1+2", texts)
+        self.assertIn(self.post.text, texts)
+
+    def test_non_ascii_username_in_filename(self):
+        user = User.objects.create_user(username="Пушкин")
+        self.client.force_login(user)
+        response = self.client.get(reverse("posts:export"), {"format": "csv"})
+        self.assertEqual(
+            response["Content-Disposition"],
+            'attachment; filename="export.csv"; '
+            "filename*=UTF-8''%D0%9F%D1%83%D1%88%D0%BA%D0%B8%D0%BD.csv",
+        )
+
+    def test_constant_queries(self):
+        """Два запроса на всю выгрузку, сколько бы ни было постов."""
+        with self.assertNumQueries(2):
+            list(export.export(self.user, "jsonl"))
+
+    def test_guest_and_unknown_format(self):
+        response = self.client.get(reverse("posts:export"), {"format": "xml"})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.client.logout()
+        response = self.client.get(reverse("posts:export"))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("export_user", "author", stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "author.csv")
+            call_command("export_user", "author", format="csv", output=path)
+            with open(path, encoding="utf-8", newline="") as exported:
+                self.assertEqual(len(list(csv.DictReader(exported))), 3)
@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 from http import HTTPStatus
@@ -71,8 +72,9 @@ class PostCreateFormTests(TestCase):
         self.assertEqual(Post.objects.count(), post_count + 1)
         self.assertEqual(new_post.text, form_data["text"])
         self.assertEqual(new_post.group.id, self.group.id)
-        self.assertTrue(new_post.image.name.endswith(
-            form_data["image"].name)
+        digest = hashlib.sha256(image).hexdigest()
+        self.assertEqual(
+            new_post.image.name, f"posts/{digest[:2]}/{digest}.jpg"
         )
 
     def test_edit_form_post_and_group(self):
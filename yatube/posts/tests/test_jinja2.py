@@ -0,0 +1,97 @@
+import re
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+
+User = get_user_model()
+
+PAGES = (
+    "posts/index.html",
+    "posts/group_list.html",
+    "posts/profile.html",
+    "posts/follow.html",
+    "posts/post_detail.html",
+)
+
+
+def hrefs(content):
+    return re.findall(r'href="([^"]*)"', content)
+
+
+class Jinja2TemplatesTest(TestCase):
+    """Jinja2-версии шаблонов выводят то же, что и шаблоны Django."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(title="Группа", slug="group")
+        Post.objects.bulk_create(
+            [Post(text=f"Пост {i}.", author=cls.author, group=cls.group)
+             for i in range(12)]
+        )
+        cls.post = Post.objects.first()
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text="<b>Комментарий</b>")
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+        self.urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": "group"}),
+            reverse("posts:profile", kwargs={"username": "author"}),
+            reverse("posts:follow_index"),
+            reverse("posts:post_detail", kwargs={"post_id": self.post.id}),
+        )
+
+    def get(self, url):
+        cache.clear()
+        response = self.client.get(url)
+        if response.streaming:
+            return b"".join(response.streaming_content).decode()
+        return response.content.decode()
+
+    def test_same_links_and_text(self):
+        """Ссылки и тексты постов совпадают у обоих движков."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                django = self.get(url)
+                with override_settings(JINJA2_TEMPLATES=PAGES):
+                    jinja = self.get(url)
+                self.assertEqual(hrefs(jinja), hrefs(django))
+                self.assertEqual(
+                    re.findall(r"Пост \d+\.", jinja),
+                    re.findall(r"Пост \d+\.", django),
+                )
+                self.assertNotIn("{{", jinja)
+
+    @override_settings(JINJA2_TEMPLATES=PAGES)
+    def test_comments_form_and_escaping(self):
+        """Форма комментария с CSRF, текст комментария экранируется."""
+        content = self.get(self.urls[-1])
+        self.assertIn('name="csrfmiddlewaretoken"', content)
+        self.assertIn('class="form-control"', content)
+        self.assertIn("&lt;b&gt;Комментарий&lt;/b&gt;", content)
+
+    @override_settings(JINJA2_TEMPLATES=PAGES, STREAM_FEEDS=True)
+    def test_streaming(self):
+        """Потоковые ленты работают и с Jinja2."""
+        content = self.get(self.urls[0])
+        self.assertEqual(content.count("<hr/>"), 9)
+        self.assertTrue(content.rstrip().endswith("</html>"))
+
+    def test_benchmark_command(self):
+        """Бенчмарк печатает время обоих движков для каждого шаблона."""
+        out = StringIO()
+        call_command("benchmark_templates", number=1, repeat=1, stdout=out)
+        for name in PAGES:
+            self.assertIn(name, out.getvalue())
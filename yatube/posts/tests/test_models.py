@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
+from posts.markup import EXCERPT_LENGTH
 from posts.models import Group, Post, START_POST
 
 User = get_user_model()
@@ -45,3 +46,23 @@ class PostModelTest(TestCase):
             with self.subTest(value=value):
                 self.assertEqual(
                     post._meta.get_field(value).verbose_name, expected)
+
+    def test_html_rendered_on_save(self):
+        """При сохранении текст рендерится в экранированный HTML."""
+        post = Post.objects.create(
+            author=self.user, text="<b>жирный</b>\n\nвторой абзац")
+        self.assertEqual(
+            post.text_html,
+            "<p>&lt;b&gt;жирный&lt;/b&gt;</p>\n\n<p>второй абзац</p>",
+        )
+        post.text = "x" * (EXCERPT_LENGTH * 2)
+        post.save(update_fields=["text"])
+        post.refresh_from_db()
+        self.assertIn("x" * EXCERPT_LENGTH * 2, post.text_html)
+        self.assertLess(len(post.excerpt_html), EXCERPT_LENGTH + 10)
+
+    def test_html_rendered_on_bulk_create(self):
+        """bulk_create тоже заполняет HTML."""
+        Post.objects.bulk_create([Post(author=self.user, text="в пачке")])
+        post = Post.objects.get(text="в пачке")
+        self.assertEqual(post.excerpt_html, "<p>в пачке</p>")
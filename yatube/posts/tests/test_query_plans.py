@@ -0,0 +1,109 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+
+User = get_user_model()
+
+AUTHORS = 30
+POSTS_PER_AUTHOR = 40
+COMMENTS_PER_POST = 3
+FOLLOWS_PER_USER = 10
+# Полный проход по таблице без индекса: «SCAN posts_post» без «USING».
+FULL_SCAN_RE = re.compile(
+    r"\bSCAN (?:TABLE )?(posts_post|posts_follow)\b(?! USING)")
+
+
+class QueryPlanTest(TestCase):
+    """Верхние границы числа запросов и отсутствие полных проходов по
+    posts_post и posts_follow для каждого представления posts.views."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        User.objects.bulk_create(
+            User(username=f"author{number}") for number in range(AUTHORS))
+        cls.authors = list(User.objects.order_by("pk"))
+        cls.user = cls.authors[0]
+        Post.objects.bulk_create(
+            Post(
+                author=author,
+                text=f"Пост номер {number} автора {author.username}",
+                group=cls.group if number % 2 else None,
+            )
+            for author in cls.authors
+            for number in range(POSTS_PER_AUTHOR)
+        )
+        cls.post = Post.objects.filter(author=cls.user).first()
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=author, text="Комментарий")
+            for author in cls.authors[:COMMENTS_PER_POST * 5]
+        )
+        Follow.objects.bulk_create(
+            Follow(user=user, author=author)
+            for user in cls.authors
+            for author in cls.authors[:FOLLOWS_PER_USER]
+            if user != author
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def assert_efficient(self, method, url, max_queries, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data or {})
+            # Потоковый ответ читает базу, пока отдаётся тело.
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertLessEqual(
+            len(queries), max_queries,
+            "\n".join(query["sql"] for query in queries),
+        )
+        for query in queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT") or "posts_" not in sql:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                plan = "\n".join(row[-1] for row in cursor.fetchall())
+            self.assertIsNone(
+                FULL_SCAN_RE.search(plan), f"{sql}\n{plan}")
+
+    def test_views(self):
+        author = self.authors[5].username
+        views = (
+            ("get", reverse("posts:index"), 4),
+            ("get", reverse("posts:group_list", args=(self.group.slug,)), 5),
+            ("get", reverse("posts:profile", args=(author,)), 6),
+            ("get", reverse("posts:post_detail", args=(self.post.pk,)), 5),
+            ("get", reverse("posts:post_create"), 3),
+            ("get", reverse("posts:post_edit", args=(self.post.pk,)), 5),
+            ("get", reverse("posts:follow_index"), 4),
+            ("get", reverse("posts:search"), 5, {"q": "номер 7"}),
+            ("get", reverse("posts:search_json"), 2, {"q": "номер 7"}),
+            ("post", reverse("posts:add_comment", args=(self.post.pk,)), 4,
+             {"text": "Новый комментарий"}),
+            ("get", reverse("posts:profile_follow", args=(author,)), 4),
+            ("get", reverse("posts:profile_unfollow", args=(author,)), 4),
+            ("get", reverse("posts:export"), 3, {"format": "jsonl"}),
+            ("get", reverse("posts:export"), 3, {"format": "csv"}),
+        )
+        for method, url, max_queries, *data in views:
+            with self.subTest(url=url):
+                self.assert_efficient(method, url, max_queries, *data)
@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+
+User = get_user_model()
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="author")
+        cls.other = User.objects.create_user(username="other")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text="Лев Толстой <b>написал</b> роман",
+            group=cls.group,
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.other,
+            text="Толстой кот спит на диване",
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def search(self, **params):
+        response = self.client.get(reverse("posts:search"), params)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return list(response.context["page_obj"])
+
+    def test_search_finds_posts(self):
+        """Поиск находит посты по словам и префиксу."""
+        self.assertEqual(len(self.search(q="толстой")), 2)
+        self.assertEqual(self.search(q="рома"), [self.post])
+        self.assertEqual(self.search(q="жираф"), [])
+        self.assertEqual(self.search(q='"('), [])
+
+    def test_search_filters(self):
+        """Фильтры по группе и автору сужают выдачу."""
+        self.assertEqual(
+            self.search(q="толстой", group=self.group.slug), [self.post])
+        self.assertEqual(
+            self.search(q="толстой", author="other"), [self.other_post])
+
+    def test_snippet_is_escaped_and_highlighted(self):
+        post = self.search(q="написал")[0]
+        self.assertIn("&lt;b&gt;<mark>написал</mark>", post.highlighted)
+
+    def test_index_follows_post_writes(self):
+        """Индекс обновляется при изменении и удалении постов."""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = "Совсем другой текст"
+        post.save()
+        self.assertEqual(self.search(q="роман"), [])
+        self.assertEqual(self.search(q="другой"), [post])
+        Post.objects.filter(pk=self.other_post.pk).delete()
+        self.assertEqual(self.search(q="кот"), [])
+
+    def test_search_json(self):
+        response = self.client.get(
+            reverse("posts:search_json"), {"q": "кот"})
+        data = response.json()
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(data["results"][0]["id"], self.other_post.pk)
+        self.assertIn("<mark>кот</mark>", data["results"][0]["snippet"])
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser(
+            "admin", "admin@example.com", "password")
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "кот"})
+        self.assertEqual(
+            list(response.context["cl"].result_list), [self.other_post])
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from posts.models import Post
+from posts.signals import image_references, release_image
+
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+IMAGE = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class HashedMediaStorageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="author")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, name):
+        return Post.objects.create(
+            author=self.user,
+            text="Тестовый пост",
+            image=SimpleUploadedFile(name, IMAGE, content_type="image/gif"),
+        )
+
+    def age_file(self, name):
+        path = Post._meta.get_field("image").storage.path(name)
+        past = time.time() - 3600
+        os.utime(path, (past, past))
+        return path
+
+    def test_same_content_is_stored_once(self):
+        """Одинаковые картинки ссылаются на один файл."""
+        first = self.create_post("first.gif")
+        second = self.create_post("SECOND.GIF")
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(image_references(first.image.name), 2)
+        directory = os.path.dirname(first.image.path)
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_release_keeps_referenced_file(self):
+        """Файл удаляется только вместе с последней ссылкой."""
+        first = self.create_post("first.gif")
+        second = self.create_post("second.gif")
+        name = first.image.name
+        path = self.age_file(name)
+        first.delete()
+        self.assertFalse(release_image(name))
+        self.assertTrue(os.path.exists(path))
+        second.delete()
+        self.assertTrue(release_image(name))
+        self.assertFalse(os.path.exists(path))
+
+    def test_release_skips_recent_file(self):
+        """Только что записанный файл не удаляется."""
+        post = self.create_post("first.gif")
+        name = post.image.name
+        post.delete()
+        self.assertFalse(release_image(name))
+        self.assertTrue(os.path.exists(post.image.path))
@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+import unittest
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core import jobs
+from core.models import Job, QueuedEmail
+from posts.models import Post
+
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    EMAIL_BACKEND="core.mail.QueuedEmailBackend",
+    QUEUED_EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class PostTasksTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="author", email="author@test.ru")
+        self.reader = User.objects.create_user(username="reader")
+
+    @unittest.skipUnless(
+        hasattr(Image, "ANTIALIAS"),
+        "sorl-thumbnail 12.7 работает только с Pillow < 10 "
+        "(см. requirements.txt)",
+    )
+    def test_post_create_makes_thumbnails(self):
+        self.client.force_login(self.author)
+        self.client.post(reverse("posts:post_create"), {
+            "text": "Пост с картинкой",
+            "image": SimpleUploadedFile("small.gif", SMALL_GIF, "image/gif"),
+        })
+        job = Job.objects.get()
+        self.assertEqual(job.name, "posts.make_thumbnails")
+        self.assertTrue(jobs.run_next())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+
+    def test_comment_notifies_author(self):
+        """Автору уходит письмо через очередь почты."""
+        post = Post.objects.create(author=self.author, text="Пост")
+        self.client.force_login(self.reader)
+        self.client.post(
+            reverse("posts:add_comment", args=[post.pk]),
+            {"text": "Комментарий"},
+        )
+        self.assertTrue(jobs.run_next())
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.recipients, "author@test.ru")
+        # Письмо поставило в очередь задачу отправки почты.
+        self.assertTrue(jobs.run_next())
+        self.assertFalse(QueuedEmail.objects.exists())
+        self.assertEqual(
+            Job.objects.filter(status=Job.DONE).count(), 2)
+
+    def test_multiline_post_is_notified(self):
+        """Переводы строк из текста поста не попадают в заголовок."""
+        post = Post.objects.create(author=self.author, text="Пост\nв две")
+        self.client.force_login(self.reader)
+        self.client.post(
+            reverse("posts:add_comment", args=[post.pk]),
+            {"text": "Комментарий"},
+        )
+        self.assertTrue(jobs.run_next())
+        self.assertTrue(jobs.run_next())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            mail.outbox[0].subject, "Новый комментарий к посту «Пост в две»")
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 2)
+
+    def test_own_comment_is_not_notified(self):
+        post = Post.objects.create(author=self.author, text="Пост")
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse("posts:add_comment", args=[post.pk]),
+            {"text": "Комментарий"},
+        )
+        jobs.run_next()
+        self.assertFalse(QueuedEmail.objects.exists())
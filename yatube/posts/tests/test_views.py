@@ -10,7 +10,8 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from posts.models import Follow, Group, Post
+from posts.models import Comment, Follow, Group, Post
+from posts.views import STREAM_COMMENTS_FROM
 
 
 User = get_user_model()
@@ -252,6 +253,92 @@ class PostPaginatorTest(TestCase):
             response = self.guest_client.get(reverse_name)
             self.assertEqual(len(response.context["page_obj"]), count_posts)
 
+    def test_page_window_is_bounded(self):
+        """В паджинаторе ссылки только на соседние страницы."""
+        Post.objects.bulk_create(
+            [Post(text=f"Ещё пост{i}", author=self.user) for i in range(100)]
+        )
+        response = self.guest_client.get(
+            reverse("posts:profile", kwargs={"username": self.user.username})
+            + "?page=6"
+        )
+        self.assertEqual(
+            list(response.context["page_obj"].page_window), list(range(3, 10))
+        )
+
+
+class StreamingCommentsTest(TestCase):
+    """Длинные обсуждения отдаются потоком."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="author")
+        cls.post = Post.objects.create(author=cls.user, text="Тестовый пост")
+
+    def add_comments(self, count):
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text=f"Коммент {i}.")
+            for i in range(count)
+        )
+
+    def test_few_comments_rendered_as_usual(self):
+        """Короткое обсуждение рендерится обычным ответом."""
+        self.add_comments(3)
+        response = self.client.get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.id}))
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.context["comments"]), 3)
+
+    def test_many_comments_streamed(self):
+        """Длинное обсуждение приходит потоком и целиком."""
+        self.add_comments(STREAM_COMMENTS_FROM + 1)
+        response = self.client.get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.id}))
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("Коммент 0.", content)
+        self.assertIn(f"Коммент {STREAM_COMMENTS_FROM}.", content)
+        self.assertTrue(content.rstrip().endswith("</html>"))
+        self.assertNotIn("<!--stream-->", content)
+
+
+@override_settings(STREAM_FEEDS=True)
+class StreamingFeedsTest(TestCase):
+    """При STREAM_FEEDS ленты отдаются потоком."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="author")
+        cls.group = Group.objects.create(title="Группа", slug="group")
+        Post.objects.bulk_create(
+            [Post(text=f"Потоковый пост {i}.", author=cls.user,
+                  group=cls.group) for i in range(12)]
+        )
+        Follow.objects.create(
+            user=User.objects.create_user(username="reader"), author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.get(username="reader"))
+
+    def test_feeds_are_streamed(self):
+        """Потоковые ленты содержат страницу постов и паджинатор."""
+        pages = (
+            reverse("posts:index"),
+            reverse("posts:group_list", kwargs={"slug": self.group.slug}),
+            reverse("posts:profile", kwargs={"username": "author"}),
+            reverse("posts:follow_index"),
+        )
+        for url in pages:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                content = b"".join(response.streaming_content).decode()
+                self.assertEqual(content.count("Потоковый пост"), 10)
+                self.assertEqual(content.count("<hr/>"), 9)
+                self.assertIn("?page=2", content)
+                self.assertTrue(content.rstrip().endswith("</html>"))
+
 
 class FollowViewTest(TestCase):
     """Проверка функции подписки."""
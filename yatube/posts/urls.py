@@ -18,4 +18,7 @@ urlpatterns = [
          name="profile_follow"),
     path("profile/<str:username>/unfollow/", views.profile_unfollow,
          name="profile_unfollow"),
+    path("search/", views.search, name="search"),
+    path("search/json/", views.search_json, name="search_json"),
+    path("export/", views.export, name="export"),
 ]
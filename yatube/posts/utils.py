@@ -1,10 +1,121 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Max
+from django.shortcuts import render
+from django.utils.functional import cached_property
+
+from core.streaming import stream_render
+
+from .models import Group
 
 POSTS_PER_PAGE = 10
+# Сколько соседних страниц показывать по обе стороны от текущей.
+PAGE_WINDOW = 3
+# До такого размера таблицы честный COUNT(*) дешевле любых оценок.
+ESTIMATE_THRESHOLD = 10000
+ESTIMATE_SQL = {
+    "postgresql": "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+    # В SQLite статистика появляется только после ANALYZE.
+    "sqlite": "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1",
+}
+GROUP_CHOICES_CACHE_KEY = "posts:group_choices"
+GROUP_CHOICES_CACHE_TIME = 60 * 60
+# Сигнал сбрасывает только свой кеш процесса: без общего кеша остальные
+# воркеры увидят изменения групп не позже чем через столько секунд.
+GROUP_CHOICES_LOCAL_CACHE_TIME = 10
 
 
 def paginate(request, posts):
     paginator = Paginator(posts, POSTS_PER_PAGE)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
+    page_obj.page_window = page_window(page_obj)
     return page_obj
+
+
+def template_engine(template_name):
+    """Движок для шаблона: "jinja2" для имён из JINJA2_TEMPLATES,
+    иначе None — первый подходящий, то есть Django."""
+    if template_name in settings.JINJA2_TEMPLATES:
+        return "jinja2"
+    return None
+
+
+def render_feed(request, template_name, context,
+                item_template="posts/includes/post.html"):
+    """render() для лент постов.
+
+    При STREAM_FEEDS страница уходит потоком: шапка — сразу, посты
+    текущей страницы — по мере чтения курсора."""
+    using = template_engine(template_name)
+    if not settings.STREAM_FEEDS:
+        return render(request, template_name, context, using=using)
+    posts = context["page_obj"].object_list
+    if hasattr(posts, "iterator"):
+        posts = posts.iterator()
+    return stream_render(
+        request, template_name, context, posts, item_template, "post",
+        using=using,
+    )
+
+
+def page_window(page_obj, size=PAGE_WINDOW):
+    """Номера страниц вокруг текущей: в отличие от page_range, их число
+    не растёт вместе с числом постов."""
+    first = max(page_obj.number - size, 1)
+    last = min(page_obj.number + size, page_obj.paginator.num_pages)
+    return range(first, last + 1)
+
+
+def estimate_count(queryset):
+    """Приблизительное число строк таблицы без полного сканирования."""
+    connection = connections[queryset.db]
+    sql = ESTIMATE_SQL.get(connection.vendor)
+    estimate = 0
+    if sql:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+        except DatabaseError:
+            row = None
+        if row and row[0]:
+            estimate = int(str(row[0]).split()[0])
+    if not estimate:
+        # Первичный ключ растёт монотонно: MAX(id) — оценка сверху.
+        estimate = queryset.aggregate(last=Max("pk"))["last"] or 0
+    return estimate
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который для нефильтрованных больших таблиц берёт
+    оценку числа строк вместо COUNT(*)."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, "query") or queryset.query.where:
+            return super().count
+        estimate = estimate_count(queryset)
+        if estimate < ESTIMATE_THRESHOLD:
+            return super().count
+        return estimate
+
+
+def group_choices():
+    """Варианты выбора группы, общие для всех строк и запросов.
+    Сбрасываются сигналом при изменении групп; без SHARED_CACHE живут
+    недолго, потому что другие процессы сброса не видят."""
+    choices = cache.get(GROUP_CHOICES_CACHE_KEY)
+    if choices is None:
+        choices = [("", "---------")] + list(
+            Group.objects.order_by("title").values_list("pk", "title")
+        )
+        timeout = (
+            GROUP_CHOICES_CACHE_TIME if settings.SHARED_CACHE
+            else GROUP_CHOICES_LOCAL_CACHE_TIME
+        )
+        cache.set(GROUP_CHOICES_CACHE_KEY, choices, timeout)
+    return choices
@@ -1,43 +1,54 @@
+from urllib.parse import quote
+
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.views.decorators.cache import cache_page
 
+from core.jobs import enqueue
+from core.streaming import stream_render
+
+from . import export as post_export
+from . import search as post_search
 from .models import Comment, Follow, Group, Post, User
 from .forms import PostForm, CommentForm
-from .utils import paginate
+from .utils import paginate, render_feed, template_engine
 
 
 CACHE_TIME = 20
+# С этого числа комментариев post_detail отдаёт их потоком.
+STREAM_COMMENTS_FROM = 200
 
 
 @cache_page(CACHE_TIME, key_prefix="index_page")
 def index(request):
-    posts = Post.objects.select_related("author", "group")
+    posts = Post.objects.for_feed()
     page_obj = paginate(request, posts)
     context = {
         "posts": posts,
         "page_obj": page_obj,
     }
-    return render(request, "posts/index.html", context)
+    return render_feed(request, "posts/index.html", context)
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    posts = group.posts.for_feed()
     page_obj = paginate(request, posts)
     context = {
         "group": group,
         "posts": posts,
         "page_obj": page_obj,
     }
-    return render(request, "posts/group_list.html", context)
+    return render_feed(request, "posts/group_list.html", context)
 
 
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    post_count = posts.count()
+    posts = author.posts.for_feed()
     page_obj = paginate(request, posts)
+    post_count = page_obj.paginator.count
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user, author=author).exists()
     context = {
@@ -46,21 +57,35 @@ def profile(request, username):
         "post_count": post_count,
         "following": following,
     }
-    return render(request, "posts/profile.html", context)
+    return render_feed(
+        request, "posts/profile.html", context,
+        "posts/includes/profile_post.html",
+    )
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    post_count = Post.objects.select_related("author").count()
+    post = get_object_or_404(
+        Post.objects.select_related("author", "group"), id=post_id)
+    post_count = post.author.posts.count()
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post_id=post.id)
+    comments = Comment.objects.filter(post_id=post.id).select_related(
+        "author")
+    first_comments = comments[:STREAM_COMMENTS_FROM + 1]
     context = {
         "post": post,
         "post_count": post_count,
         "form": form,
-        "comments": comments,
     }
-    return render(request, "posts/post_detail.html", context)
+    using = template_engine("posts/post_detail.html")
+    if len(first_comments) > STREAM_COMMENTS_FROM:
+        # Длинное обсуждение не держим в памяти целиком.
+        return stream_render(
+            request, "posts/post_detail.html", context,
+            comments.iterator(), "posts/includes/comment.html", "comment",
+            using=using,
+        )
+    context["comments"] = first_comments
+    return render(request, "posts/post_detail.html", context, using=using)
 
 
 @login_required
@@ -71,6 +96,8 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         form.save()
+        if post.image:
+            enqueue("posts.make_thumbnails", post.pk)
         return redirect("posts:profile", post.author)
     return render(
         request, "posts/create_or_update_post.html", {"form": form})
@@ -86,6 +113,8 @@ def post_edit(request, post_id):
         return redirect("posts:post_detail", post_id)
     if form.is_valid():
         form.save()
+        if "image" in form.changed_data and post.image:
+            enqueue("posts.make_thumbnails", post.pk)
         return redirect("posts:post_detail", post_id)
     return render(
         request, "posts/create_or_update_post.html",
@@ -103,18 +132,21 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        enqueue("posts.notify_comment", comment.pk)
     return redirect("posts:post_detail", post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = Post.objects.filter(
+        author__following__user=request.user
+    ).for_feed()
     page_obj = paginate(request, posts)
     context = {
         "posts": posts,
         "page_obj": page_obj,
     }
-    return render(request, "posts/follow.html", context)
+    return render_feed(request, "posts/follow.html", context)
 
 
 @login_required
@@ -133,3 +165,75 @@ def profile_unfollow(request, username):
     user = get_object_or_404(User, username=username)
     Follow.objects.filter(user_id=request.user.id, author_id=user.id).delete()
     return redirect("posts:profile", username=username)
+
+
+def search_results(request):
+    """Найденные посты с учётом фильтров по группе и автору."""
+    query = request.GET.get("q", "").strip()
+    posts = Post.objects.select_related("author", "group")
+    group = request.GET.get("group")
+    if group:
+        posts = posts.filter(group__slug=group)
+    author = request.GET.get("author")
+    if author:
+        posts = posts.filter(author__username=author)
+    return query, paginate(request, post_search.search(posts, query))
+
+
+def search(request):
+    query, page_obj = search_results(request)
+    for post in page_obj:
+        post.highlighted = post_search.highlight(post)
+    params = request.GET.copy()
+    params.pop("page", None)
+    context = {
+        "query": query,
+        "page_obj": page_obj,
+        "page_query": "&" + params.urlencode() if params else "",
+        "groups": Group.objects.only("title", "slug"),
+    }
+    return render(request, "posts/search.html", context)
+
+
+def search_json(request):
+    query, page_obj = search_results(request)
+    results = [
+        {
+            "id": post.pk,
+            "url": reverse("posts:post_detail", args=(post.pk,)),
+            "author": post.author.username,
+            "group": post.group.slug if post.group else None,
+            "pub_date": post.pub_date.isoformat(),
+            "rank": post.rank,
+            "snippet": post_search.highlight(post),
+        }
+        for post in page_obj
+    ]
+    return JsonResponse({
+        "query": query,
+        "page": page_obj.number,
+        "num_pages": page_obj.paginator.num_pages,
+        "count": page_obj.paginator.count,
+        "results": results,
+    })
+
+
+@login_required
+def export(request):
+    """Выгрузка своих постов и комментариев: ?format=jsonl или csv."""
+    export_format = request.GET.get("format", "jsonl")
+    if export_format not in post_export.FORMATS:
+        raise Http404("Неизвестный формат выгрузки.")
+    content_type, extension = post_export.FORMATS[export_format]
+    response = StreamingHttpResponse(
+        post_export.export(
+            request.user, export_format, request.build_absolute_uri),
+        content_type=content_type,
+    )
+    # Имя пользователя может быть не ASCII: в filename* оно
+    # закодировано по RFC 5987, а filename — запасной вариант.
+    response["Content-Disposition"] = (
+        f'attachment; filename="export.{extension}"; '
+        f"filename*=UTF-8''{quote(request.user.username)}.{extension}"
+    )
+    return response
@@ -0,0 +1,32 @@
+from django.contrib import admin, messages
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from core.jobs import enqueue
+
+
+User = get_user_model()
+
+
+class BatchDeleteUserAdmin(UserAdmin):
+    actions = ("delete_in_batches",)
+
+    def delete_in_batches(self, request, queryset):
+        """Ставит удаление в очередь runworker: страница не ждёт каскада."""
+        users = list(queryset.exclude(pk=request.user.pk))
+        for user in users:
+            # save(), а не update(): post_save сбрасывает пользователя
+            # в кеше сессий (users.signals).
+            user.is_active = False
+            user.save(update_fields=["is_active"])
+            enqueue("users.delete_user", user.pk)
+        self.message_user(
+            request,
+            f"Пользователей поставлено на удаление: {len(users)}.",
+            messages.SUCCESS,
+        )
+    delete_in_batches.short_description = "Удалить пачками в фоне"
+
+
+admin.site.unregister(User)
+admin.site.register(User, BatchDeleteUserAdmin)
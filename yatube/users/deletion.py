@@ -0,0 +1,63 @@
+"""Удаление пользователя пачками.
+
+user.delete() сначала собирает в памяти все связанные объекты (посты,
+комментарии к ним, подписки) и удаляет их одной транзакцией: у активного
+автора это долго держит блокировки базы. Здесь всё удаляется пачками по
+batch_size строк, каждая в своей транзакции. Прерванное удаление можно
+просто запустить снова — оно продолжит с оставшихся строк.
+"""
+import time
+
+from django.db import transaction
+from django.db.models import Q
+
+from posts.models import Comment, Follow, Post
+
+
+BATCH_SIZE = 500
+
+
+def related_querysets(user):
+    """(название, queryset) в порядке удаления: комментарии раньше постов,
+    чтобы пачка постов не тянула за собой каскад."""
+    return (
+        ("комментарии", Comment.objects.filter(author=user)),
+        ("комментарии к постам", Comment.objects.filter(post__author=user)),
+        ("подписки", Follow.objects.filter(Q(user=user) | Q(author=user))),
+        # Для постов срабатывает post_delete: картинки и миниатюры
+        # удаляются после коммита пачки (posts.signals).
+        ("посты", Post.objects.filter(author=user)),
+    )
+
+
+def delete_in_batches(queryset, batch_size=BATCH_SIZE):
+    """Удаляет строки queryset пачками; отдаёт размер каждой пачки."""
+    model = queryset.model
+    ids = queryset.order_by("pk").values_list("pk", flat=True)
+    while True:
+        batch = list(ids[:batch_size])
+        if not batch:
+            return
+        with transaction.atomic():
+            model.objects.filter(pk__in=batch).delete()
+        yield len(batch)
+
+
+def delete_user(user, batch_size=BATCH_SIZE, pause=0):
+    """Удаляет пользователя и его данные; после каждой пачки отдаёт
+    (название, удалено строк). pause — секунды между пачками, чтобы
+    не мешать остальным запросам."""
+    # Переданный объект мог устареть (например, взят из кеша).
+    user.refresh_from_db()
+    if user.is_active:
+        # Пока идёт удаление, пользователь не может войти и писать;
+        # save() сбрасывает его в кеше сессий (users.signals).
+        user.is_active = False
+        user.save(update_fields=["is_active"])
+    for label, queryset in related_querysets(user):
+        for deleted in delete_in_batches(queryset, batch_size):
+            yield label, deleted
+            if pause:
+                time.sleep(pause)
+    user.delete()
+    yield "пользователь", 1
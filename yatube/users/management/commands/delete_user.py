@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from users import deletion
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет пользователей вместе с постами, комментариями и "
+        "подписками пачками, не собирая каскад в памяти. Прерванное "
+        "удаление продолжается повторным запуском."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("usernames", nargs="+")
+        parser.add_argument(
+            "--batch-size", type=int, default=deletion.BATCH_SIZE,
+            help="Сколько строк удалять в одной транзакции.",
+        )
+        parser.add_argument(
+            "--pause", type=float, default=0,
+            help="Пауза между пачками, в секундах.",
+        )
+
+    def handle(self, *args, **options):
+        users = list(User.objects.filter(username__in=options["usernames"]))
+        missing = set(options["usernames"]) - {
+            user.username for user in users}
+        if missing:
+            raise CommandError(
+                f"Пользователи не найдены: {', '.join(sorted(missing))}.")
+        for user in users:
+            totals = {}
+            for label, deleted in deletion.delete_user(
+                    user, options["batch_size"], options["pause"]):
+                totals[label] = totals.get(label, 0) + deleted
+            summary = ", ".join(
+                f"{label}: {count}" for label, count in totals.items())
+            self.stdout.write(self.style.SUCCESS(
+                f"{user.username} удалён ({summary})."))
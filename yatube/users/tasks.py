@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+
+from core.jobs import task
+
+from . import deletion
+
+
+User = get_user_model()
+
+
+@task("users.delete_user")
+def delete_user(user_id, batch_size=deletion.BATCH_SIZE):
+    """Удаляет пользователя пачками; упавшая задача продолжит с места
+    остановки."""
+    user = User.objects.filter(pk=user_id).first()
+    if user is not None:
+        for _ in deletion.delete_user(user, batch_size):
+            pass
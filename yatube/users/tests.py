@@ -0,0 +1,198 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import jobs
+from core.models import Job
+from posts.models import Comment, Follow, Post
+from users import deletion
+
+
+User = get_user_model()
+
+PASSWORD = "old-Pa55word"
+
+
+# В одном процессе тестов кеш в памяти ведёт себя как общий.
+@override_settings(
+    SHARED_CACHE=True,
+    SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+)
+class CachedSessionUserTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="reader", password=PASSWORD)
+        self.client = Client()
+        self.client.login(username="reader", password=PASSWORD)
+
+    def current_user(self, client=None):
+        response = (client or self.client).get(reverse("about:author"))
+        return response.context["user"]
+
+    def test_session_and_user_come_from_cache(self):
+        """Повторный запрос не обращается к сессиям и пользователям."""
+        self.current_user()
+        with CaptureQueriesContext(connection) as queries:
+            user = self.current_user()
+        self.assertEqual(user, self.user)
+        tables = " ".join(query["sql"] for query in queries)
+        self.assertNotIn("django_session", tables)
+        self.assertNotIn("auth_user", tables)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_process_local_cache_reads_user_from_db(self):
+        """С кешем в памяти процесса пользователь не кешируется: сброс
+        записи не дошёл бы до других воркеров."""
+        self.current_user()
+        with CaptureQueriesContext(connection) as queries:
+            self.current_user()
+        self.assertIn("auth_user", " ".join(q["sql"] for q in queries))
+
+    def test_model_backend_sessions_stay_valid(self):
+        """Сессии, созданные до кеширования, не разлогиниваются."""
+        client = Client()
+        client.force_login(
+            self.user, backend="django.contrib.auth.backends.ModelBackend")
+        self.assertTrue(self.current_user(client).is_authenticated)
+
+    def test_wrong_password(self):
+        self.assertFalse(
+            Client().login(username="reader", password="wrong"))
+
+    def test_profile_edit_invalidates_cached_user(self):
+        self.current_user()
+        self.user.first_name = "Новое имя"
+        self.user.save()
+        self.assertEqual(self.current_user().first_name, "Новое имя")
+
+    def test_password_change_logs_out_other_sessions(self):
+        """Сессии со старым паролем не живут за счёт кеша."""
+        other = Client()
+        other.login(username="reader", password=PASSWORD)
+        self.assertTrue(self.current_user(other).is_authenticated)
+        response = self.client.post(reverse("users:password_change"), {
+            "old_password": PASSWORD,
+            "new_password1": "new-Pa55word",
+            "new_password2": "new-Pa55word",
+        })
+        self.assertRedirects(response, reverse("users:password_change_done"))
+        self.assertTrue(self.current_user().is_authenticated)
+        self.assertFalse(self.current_user(other).is_authenticated)
+
+
+class DefaultSessionTest(TestCase):
+    """Настройки по умолчанию: кеш в памяти процесса."""
+
+    def test_session_is_not_read_from_db(self):
+        user = User.objects.create_user(username="reader", password=PASSWORD)
+        self.client.login(username="reader", password=PASSWORD)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("about:author"))
+        self.assertEqual(response.context["user"], user)
+        self.assertNotIn(
+            "django_session", " ".join(q["sql"] for q in queries))
+        self.assertEqual(len(queries), 1)
+
+    def test_password_change_logs_out_other_sessions(self):
+        User.objects.create_user(username="reader", password=PASSWORD)
+        self.client.login(username="reader", password=PASSWORD)
+        other = Client()
+        other.login(username="reader", password=PASSWORD)
+        self.client.post(reverse("users:password_change"), {
+            "old_password": PASSWORD,
+            "new_password1": "new-Pa55word",
+            "new_password2": "new-Pa55word",
+        })
+        response = other.get(reverse("about:author"))
+        self.assertFalse(response.context["user"].is_authenticated)
+
+
+class BatchedDeletionMixin:
+    def setUp(self):
+        self.author = User.objects.create_user(username="author")
+        self.other = User.objects.create_user(username="other")
+        # bulk_create в SQLite не возвращает id, а они нужны комментариям.
+        own_posts = [
+            Post.objects.create(author=self.author, text=f"Пост {number}")
+            for number in range(7)
+        ]
+        other_post = Post.objects.create(author=self.other, text="Чужой")
+        Comment.objects.bulk_create(
+            [Comment(post=post, author=self.other, text="К посту")
+             for post in own_posts]
+            + [Comment(post=other_post, author=self.author, text="Свой")
+               for _ in range(4)]
+        )
+        Follow.objects.create(user=self.author, author=self.other)
+        Follow.objects.create(user=self.other, author=self.author)
+
+    def assert_deleted(self):
+        self.assertFalse(User.objects.filter(username="author").exists())
+        self.assertEqual(list(Post.objects.values_list("text", flat=True)),
+                         ["Чужой"])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+
+
+class BatchedDeletionTest(BatchedDeletionMixin, TestCase):
+    def test_deleted_in_batches(self):
+        batches = list(deletion.delete_user(self.author, batch_size=3))
+        self.assertEqual(batches, [
+            ("комментарии", 3), ("комментарии", 1),
+            ("комментарии к постам", 3), ("комментарии к постам", 3),
+            ("комментарии к постам", 1),
+            ("подписки", 2),
+            ("посты", 3), ("посты", 3), ("посты", 1),
+            ("пользователь", 1),
+        ])
+        self.assert_deleted()
+
+    def test_interrupted_deletion_resumes(self):
+        batches = deletion.delete_user(self.author, batch_size=3)
+        for _ in range(6):
+            next(batches)
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 7)
+        out = StringIO()
+        call_command("delete_user", "author", batch_size=3, stdout=out)
+        self.assertIn("посты: 7", out.getvalue())
+        self.assert_deleted()
+
+
+@override_settings(
+    SHARED_CACHE=True,
+    SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+)
+class BatchedDeletionAdminTest(BatchedDeletionMixin, TransactionTestCase):
+    def test_admin_action_enqueues_deletion(self):
+        cache.clear()
+        author_client = Client()
+        author_client.force_login(self.author)
+        # Пользователь сессии попадает в кеш.
+        author_client.get(reverse("about:author"))
+        admin = User.objects.create_superuser(
+            "admin", "admin@test.ru", PASSWORD)
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse("admin:auth_user_changelist"),
+            {"action": "delete_in_batches",
+             "_selected_action": [self.author.pk, admin.pk]},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Job.objects.get().name, "users.delete_user")
+        # Ещё до удаления автор не может ни смотреть, ни писать от себя.
+        response = author_client.get(reverse("about:author"))
+        self.assertFalse(response.context["user"].is_authenticated)
+        self.assertTrue(jobs.run_next())
+        self.assert_deleted()
+        self.assertTrue(User.objects.filter(pk=admin.pk).exists())
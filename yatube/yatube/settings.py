@@ -30,36 +30,81 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.ServerTimingMiddleware",
+    "core.middleware.SlowQueryMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
 ROOT_URLCONF = "yatube.urls"
 
+# Режим профилирования шаблонов: время и число вызовов каждого шаблона,
+# include, тега и фильтра в логе Server-Timing и в /metrics/.
+TEMPLATE_PROFILING = False
+
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+if not DEBUG:
+    # Скомпилированные шаблоны живут в памяти воркера до перезапуска.
+    TEMPLATE_LOADERS = [
+        ("django.template.loaders.cached.Loader", TEMPLATE_LOADERS),
+    ]
+
+TEMPLATE_CONTEXT_PROCESSORS = [
+    "django.template.context_processors.debug",
+    "django.template.context_processors.request",
+    "django.contrib.auth.context_processors.auth",
+    "django.contrib.messages.context_processors.messages",
+
+    "core.context_processors.year.year",
+]
+
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "core.timing.TimedDjangoTemplates",
+        "NAME": "django",
         "DIRS": [os.path.join(BASE_DIR, "templates")],
-        "APP_DIRS": True,
         "OPTIONS": {
-            "context_processors": [
-                "django.template.context_processors.debug",
-                "django.template.context_processors.request",
-                "django.contrib.auth.context_processors.auth",
-                "django.contrib.messages.context_processors.messages",
-
-                "core.context_processors.year.year",
-            ],
+            "profile": TEMPLATE_PROFILING,
+            "loaders": TEMPLATE_LOADERS,
+            "context_processors": TEMPLATE_CONTEXT_PROCESSORS,
+        },
+    },
+    {
+        # Jinja2-версии шаблонов posts лежат в jinja2/ под теми же именами.
+        "BACKEND": "django.template.backends.jinja2.Jinja2",
+        "DIRS": [os.path.join(BASE_DIR, "jinja2")],
+        "OPTIONS": {
+            "environment": "core.jinja2.environment",
+            "context_processors": TEMPLATE_CONTEXT_PROCESSORS,
         },
     },
 ]
+# Шаблоны, которые рендерит Jinja2 вместо Django, например
+# ["posts/index.html", "posts/post_detail.html"] (см. posts.utils).
+JINJA2_TEMPLATES = []
 
 WSGI_APPLICATION = "yatube.wsgi.application"
+# Прогревать воркер в yatube.wsgi до первого запроса: компиляция шаблонов,
+# URL-резолверы, ленивые импорты (см. core.warmup).
+WARMUP_ON_START = not DEBUG
+# Модули, которые иначе импортируются только при первом запросе.
+WARMUP_IMPORTS = [
+    "PIL.Image",
+    "PIL.GifImagePlugin",
+    "PIL.JpegImagePlugin",
+    "PIL.PngImagePlugin",
+]
 
 DATABASES = {
     "default": {
@@ -95,6 +140,13 @@ USE_TZ = True
 
 STATIC_URL = "/static/"
 STATICFILES_DIRS = (os.path.join(BASE_DIR, "static"),)
+# collectstatic собирает сюда файлы с хешем в имени и их .gz/.br копии.
+STATIC_ROOT = os.path.join(BASE_DIR, "collected_static")
+STATICFILES_STORAGE = "core.staticfiles.CompressedManifestStaticFilesStorage"
+STATIC_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+# Файл, которого нет в манифесте collectstatic, — ошибка. В разработке
+# манифеста нет, и {% static %} ссылается на исходное имя.
+STATIC_MANIFEST_STRICT = not DEBUG
 
 
 LOGIN_URL = "users:login"
@@ -102,16 +154,115 @@ LOGIN_REDIRECT_URL = "posts:index"
 # LOGOUT_REDIRECT_URL = "posts:index"
 
 
-EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
+# Письма ставятся в очередь (core.mail) и уходят командой
+# send_queued_mail через QUEUED_EMAIL_BACKEND; в продакшене там SMTP.
+EMAIL_BACKEND = "core.mail.QueuedEmailBackend"
+QUEUED_EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
+EMAIL_QUEUE_BATCH_SIZE = 50
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+# Пауза перед второй попыткой в секундах; дальше она удваивается.
+EMAIL_QUEUE_RETRY_DELAY = 60
 
 CSRF_FAILURE_VIEW = "core.views.csrf_failure"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# Имена картинок содержат хеш содержимого, поэтому их можно кешировать
+# практически навсегда.
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+# None — файлы читает Django; "x-sendfile" (Apache, lighttpd) или
+# "x-accel-redirect" (nginx) — байты отдаёт фронтовой сервер.
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_REDIRECT_PREFIX = "/protected-media/"
 
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "BACKEND": "core.timing.InstrumentedLocMemCache",
     }
 }
+
+# Кеш общий для всех воркеров (Redis, Memcached), а не память процесса.
+# Только с таким кешем можно брать из него сессии и пользователей:
+# сброс записи при выходе или смене пароля виден всем воркерам.
+PROCESS_LOCAL_CACHES = (
+    "core.timing.InstrumentedLocMemCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+SHARED_CACHE = CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES
+
+# С общим кешем сессии читаются из него, а пишутся и в кеш, и в базу:
+# после сброса кеша пользователи не разлогиниваются. Без него сессия
+# хранится в подписанной cookie и тоже не требует запроса к базе;
+# цена — выход не отзывает скопированную cookie (смена пароля отзывает).
+SESSION_ENGINE = (
+    "django.contrib.sessions.backends.cached_db" if SHARED_CACHE
+    else "django.contrib.sessions.backends.signed_cookies"
+)
+
+# Пользователь сессии тоже берётся из общего кеша (без него — из базы);
+# запись сбрасывается при сохранении пользователя (users.signals).
+# ModelBackend остаётся в списке для сессий, созданных до кеширования.
+AUTHENTICATION_BACKENDS = [
+    "users.backends.CachedModelBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+USER_CACHE_TIMEOUT = 60 * 15
+
+# Отдавать ленты потоком: шапка страницы уходит клиенту до запроса постов.
+# Потоковые ответы не попадают в cache_page, поэтому главная при этом
+# не кешируется.
+STREAM_FEEDS = False
+
+# Сжатие ответов в core.middleware.CompressionMiddleware. Уровни ниже
+# максимальных: страницы сжимаются на лету, а не при сборке, как статика.
+HTML_MINIFY = True
+COMPRESS_MIN_SIZE = 512
+COMPRESS_GZIP_LEVEL = 6
+COMPRESS_BROTLI_QUALITY = 5
+
+# Фоновые задачи core.jobs, их выполняет manage.py runworker.
+JOB_MAX_ATTEMPTS = 3
+# Пауза перед повтором в секундах; с каждой попыткой удваивается.
+JOB_RETRY_DELAY = 30
+# Задача, которая выполняется дольше, считается брошенной и берётся снова.
+JOB_TIMEOUT = 60 * 10
+JOB_KEEP_DONE = 60 * 60 * 24
+# Неудачные задачи хранятся дольше, чтобы успеть разобрать ошибку.
+JOB_KEEP_FAILED = 60 * 60 * 24 * 7
+# Как часто runworker удаляет старые задачи, в секундах.
+JOB_PRUNE_INTERVAL = 60 * 10
+# Окно и предел выборки для задержек на странице /metrics/jobs/.
+JOB_STATS_WINDOW = 60 * 60
+JOB_STATS_LIMIT = 10000
+
+# Доля запросов, для которых считаются Server-Timing и строка лога
+# core.middleware: 0 — выключено, 1 — каждый запрос.
+SERVER_TIMING_SAMPLE_RATE = 0.01
+
+# Каталог, через который воркеры обмениваются снимками метрик для
+# /metrics/ (очищайте его при деплое). None — только текущий процесс.
+METRICS_DIR = None
+METRICS_FLUSH_INTERVAL = 5
+
+# Запросы дольше этого порога (в секундах) попадают в лог core.slowlog
+# и в отчёт /metrics/slow-queries/ вместе с планом выполнения.
+SLOW_QUERY_THRESHOLD = 0.1
+
+# Куда ProfilingMiddleware и manage.py profile_url складывают профили.
+PROFILE_DIR = os.path.join(BASE_DIR, "profiles")
+PROFILE_SAMPLE_INTERVAL = 0.001
+
+THUMBNAIL_BACKEND = "core.metrics.TimedThumbnailBackend"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "core": {"handlers": ["console"], "level": "INFO"},
+    },
+}
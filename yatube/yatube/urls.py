@@ -1,7 +1,12 @@
+import re
+
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import (
+    jobs, metrics, serve_media, serve_static, slow_queries,
+)
 
 
 urlpatterns = [
@@ -10,13 +15,20 @@ urlpatterns = [
     path("auth/", include("django.contrib.auth.urls")),
     path("", include("posts.urls", namespace="posts")),
     path("about/", include("about.urls", namespace="about")),
+    path("metrics/", metrics, name="metrics"),
+    path("metrics/slow-queries/", slow_queries, name="slow_queries"),
+    path("metrics/jobs/", jobs, name="jobs"),
+    re_path(
+        r"^%s(?P<path>.*)$" % re.escape(settings.MEDIA_URL.lstrip("/")),
+        serve_media,
+        name="media",
+    ),
+    re_path(
+        r"^%s(?P<path>.*)$" % re.escape(settings.STATIC_URL.lstrip("/")),
+        serve_static,
+        name="static",
+    ),
 ]
 
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.permission_denied'
-
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )